@@ -23,7 +23,7 @@ logging.basicConfig(level=logging.INFO,
                     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
 logger = logging.getLogger("FastPoolCheck")
 
-def estimate_datapoints_by_doc_ids(firebase_service, pool_id, min_points=600):
+def estimate_datapoints_by_doc_ids(firebase_service, pool_id, min_points=600, doc_ids=None):
     """
     Arvioi datapisteiden määrän markkinakontekstien dokumentti-ID:iden perusteella
     
@@ -31,6 +31,7 @@ def estimate_datapoints_by_doc_ids(firebase_service, pool_id, min_points=600):
         firebase_service: FirebaseService-instanssi
         pool_id: Poolin ID
         min_points: Vähimmäismäärä datapisteitä, jonka poolissa pitäisi olla
+        doc_ids: Valmiiksi haettu (ensimmäinen ID, viimeinen ID); None hakee ne Firebasesta
         
     Returns:
         tuple: (arvioitu määrä, todellinen määrä, ensimmäinen ID, viimeinen ID)
@@ -39,8 +40,11 @@ def estimate_datapoints_by_doc_ids(firebase_service, pool_id, min_points=600):
         # Käytä FirebaseService:n datapisteiden laskemiseen
         # mutta ensiksi kokeile saada vain ensimmäinen ja viimeinen dokumentti
 
-        # Hae ensimmäinen ja viimeinen dokumentti suoraan
-        first_id, last_id = firebase_service.get_first_and_last_document_id(pool_id)
+        # Käytä valmiiksi haettuja ID:itä tai hae ensimmäinen ja viimeinen dokumentti suoraan
+        if doc_ids is not None:
+            first_id, last_id = doc_ids
+        else:
+            first_id, last_id = firebase_service.get_first_and_last_document_id(pool_id)
         
         if not first_id or not last_id:
             logger.debug(f"Poolille {pool_id} ei löytynyt dokumentteja")
@@ -114,9 +118,11 @@ def fast_check_pools(min_points=600, limit=None, verbose=False):
     total_actual = 0
     estimation_accuracy = []
     
-    # Tarkista jokainen pooli näyttäen edistymistä
+    # Hae poolien ensimmäiset ja viimeiset dokumentti-ID:t rinnakkain erissä ja
+    # tarkista jokainen pooli näyttäen edistymistä
     total_pools = len(all_pools)
-    for i, pool_id in enumerate(all_pools):
+    pool_doc_ids = firebase_service.iter_first_and_last_document_ids(all_pools)
+    for i, (pool_id, doc_ids) in enumerate(pool_doc_ids):
         # Näytä edistyminen joka 10. poolin kohdalla tai kun saavutetaan 100%
         if i % 10 == 0 or i == total_pools - 1:
             progress = (i + 1) / total_pools * 100
@@ -125,7 +131,7 @@ def fast_check_pools(min_points=600, limit=None, verbose=False):
             sys.stdout.flush()
         
         estimated_count, actual_count, first_id, last_id = estimate_datapoints_by_doc_ids(
-            firebase_service, pool_id, min_points
+            firebase_service, pool_id, min_points, doc_ids
         )
         
         # Laske arvioinnin tarkkuus (jos molemmat ovat > 0)
@@ -25,10 +25,13 @@ def analyze_pools(firebase_service, pool_ids):
         'rejected_missing_both': 0,
     }
 
+    # Haetaan kaikkien poolien ensimmäiset ja viimeiset dokumentti-ID:t rinnakkain
+    doc_ids = firebase_service.get_first_and_last_document_ids(pool_ids)
+
     for pool_id in pool_ids:
         stats['total'] += 1
 
-        first_doc_id, last_doc_id = firebase_service.get_first_and_last_document_id(pool_id)
+        first_doc_id, last_doc_id = doc_ids[pool_id]
 
         if not first_doc_id or not last_doc_id:
             logger.warning(f"Missing first or last document for pool {pool_id}")
@@ -18,7 +18,7 @@ from typing import Dict, Optional, List, Tuple
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from src.data.firebase_service import FirebaseService
-from src.data.data_processor import preprocess_pool_data, filter_pools
+from src.data.data_processor import preprocess_all_pools, preprocess_pool_data, filter_pools
 from src.simulation.buy_simulator import BuySimulator, calculate_returns
 from src.simulation.sell_simulator import SellSimulator, calculate_trade_metrics
 
@@ -100,6 +100,9 @@ def run_simulation(args) -> Tuple[List[Dict], Optional[List[Dict]], pd.DataFrame
         logger.error("No data retrieved from Firebase")
         return [], None, df
 
+    # Calculate derived metrics for all pools in one pass
+    df = preprocess_all_pools(df)
+
     # Filter pools with sufficient data
     logger.info("Filtering pools with sufficient data...")
     valid_pools = filter_pools(df, min_data_points=args.max_delay + 50)
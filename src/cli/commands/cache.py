@@ -422,8 +422,10 @@ def import_missing_pools(
     
     start_check_time = time.time()
     
-    # Tarkista jokainen pooli näyttäen edistymistä
-    for i, pool_id in enumerate(pools_to_check):
+    # Hae poolien ensimmäiset ja viimeiset dokumentti-ID:t rinnakkain erissä ja
+    # tarkista jokainen pooli näyttäen edistymistä
+    pool_doc_ids = firebase_service.iter_first_and_last_document_ids(pools_to_check)
+    for i, (pool_id, doc_ids) in enumerate(pool_doc_ids):
         # Näytä edistymistä joka 10. poolin kohdalla
         if i % 10 == 0 or i == total_pools_to_check - 1:
             progress = (i + 1) / total_pools_to_check * 100
@@ -433,7 +435,7 @@ def import_missing_pools(
         
         # Arvioi poolien datapisteet nopeasti käyttäen ensimmäisen ja viimeisen dokumentin ID:tä
         estimated_count, actual_count, first_id, last_id = estimate_datapoints_for_pool(
-            firebase_service, pool_id, min_data_points
+            firebase_service, pool_id, min_data_points, doc_ids
         )
         
         # Laske arvioinnin tarkkuus (jos molemmat ovat > 0)
@@ -489,13 +491,14 @@ def import_missing_pools(
         incomplete_pools = []
         
         # Tarkistetaan puuttuvat poolit myös nopealla arviointimenetelmällä
-        for i, pool_id in enumerate(untrusted_pools):
+        pool_doc_ids = firebase_service.iter_first_and_last_document_ids(untrusted_pools)
+        for i, (pool_id, doc_ids) in enumerate(pool_doc_ids):
             pool_id_lower = pool_id.lower()
             local_data_count = local_pool_datapoints.get(pool_id_lower, 0)
             
             # Arvioi poolien datapisteet nopeasti käyttäen ensimmäisen ja viimeisen dokumentin ID:tä
             estimated_count, actual_count, first_id, last_id = estimate_datapoints_for_pool(
-                firebase_service, pool_id, min_data_points
+                firebase_service, pool_id, min_data_points, doc_ids
             )
             
             # Jos Firebasessa on merkittävästi enemmän dataa, lisää se täydennettäviin pooleihin
@@ -807,7 +810,7 @@ def handle_cache_command(args: argparse.Namespace):
 
 
 # Apufunktio poolien datapisteiden arvioimiseen
-def estimate_datapoints_for_pool(firebase_service, pool_id, min_points=600):
+def estimate_datapoints_for_pool(firebase_service, pool_id, min_points=600, doc_ids=None):
     """
     Arvioi datapisteiden määrän markkinakontekstien dokumentti-ID:iden perusteella
     
@@ -815,13 +818,17 @@ def estimate_datapoints_for_pool(firebase_service, pool_id, min_points=600):
         firebase_service: FirebaseService-instanssi
         pool_id: Poolin ID
         min_points: Vähimmäismäärä datapisteitä, jonka poolissa pitäisi olla
+        doc_ids: Valmiiksi haettu (ensimmäinen ID, viimeinen ID); None hakee ne Firebasesta
         
     Returns:
         tuple: (arvioitu määrä, todellinen määrä, ensimmäinen ID, viimeinen ID)
     """
     try:
-        # Hae ensimmäinen ja viimeinen dokumentti suoraan
-        first_id, last_id = firebase_service.get_first_and_last_document_id(pool_id)
+        # Käytä valmiiksi haettuja ID:itä tai hae ensimmäinen ja viimeinen dokumentti suoraan
+        if doc_ids is not None:
+            first_id, last_id = doc_ids
+        else:
+            first_id, last_id = firebase_service.get_first_and_last_document_id(pool_id)
         
         if not first_id or not last_id:
             logger.debug(f"Poolille {pool_id} ei löytynyt dokumentteja")
@@ -936,7 +943,10 @@ def import_new_pools(
     total_estimated = 0
     total_actual = 0
     
-    for i, pool_id in enumerate(new_pools):
+    # Look up the first and last document IDs concurrently in batches and use them directly
+    pool_doc_ids = firebase_service.iter_first_and_last_document_ids(new_pools)
+
+    for i, (pool_id, doc_ids) in enumerate(pool_doc_ids):
         # Display progress
         if i % 1 == 0:
             progress = (i + 1) / len(new_pools) * 100
@@ -946,7 +956,7 @@ def import_new_pools(
         
         # Estimate data points using the fast method
         estimated_count, actual_count, first_id, last_id = estimate_datapoints_for_pool(
-            firebase_service, pool_id, min_data_points
+            firebase_service, pool_id, min_data_points, doc_ids
         )
         
         # Calculate accuracy (if both counts are > 0)
@@ -1144,7 +1154,10 @@ def check_data_integrity(
     rejected_pools = []
     rejected_data = {}
     
-    for i, pool_id in enumerate(pools_to_check):
+    # Look up the first and last document IDs concurrently in batches and use them directly
+    pool_doc_ids = firebase_service.iter_first_and_last_document_ids(pools_to_check)
+
+    for i, (pool_id, doc_ids) in enumerate(pool_doc_ids):
         # Display progress
         if i % 1 == 0:
             progress = (i + 1) / len(pools_to_check) * 100
@@ -1157,7 +1170,7 @@ def check_data_integrity(
         
         # Estimate data points using the fast method
         estimated_count, actual_count, first_id, last_id = estimate_datapoints_for_pool(
-            firebase_service, pool_id, min_data_points
+            firebase_service, pool_id, min_data_points, doc_ids
         )
         
         # Categorize based on data point counts
@@ -547,7 +547,7 @@ class DataCacheService:
                         try:
                             extra_data_json = json.dumps(extra_fields, cls=CustomJSONEncoder)
                             db_fields[FIELD_ADDITIONAL_DATA] = extra_data_json
-                            logger.debug(f"Extra fields pushed to additional_data: {list(extra_fields.keys())}")
+                            logger.debug("Extra fields pushed to additional_data: %s", list(extra_fields))
                         except TypeError as e:
                             logger.warning(f"Could not convert extra fields to JSON: {e}")
                             logger.debug(f"Problematic extra fields: {extra_fields}")
@@ -586,9 +586,10 @@ class DataCacheService:
                             else:
                                 values.append(str(val))
 
-                    # Log for debugging
-                    logger.debug(f"Inserting row with columns: {cols}")
-                    logger.debug(f"First 5 values: {values[:5] if len(values) >= 5 else values}")
+                    # Log for debugging; the per-row messages are only built when DEBUG is enabled
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug(f"Inserting row with columns: {cols}")
+                        logger.debug(f"First 5 values: {values[:5]}")
 
                     # Insert data with REPLACE option to handle duplicate entries
                     conn.execute(f"INSERT OR REPLACE INTO market_data ({column_names}) VALUES ({placeholders})", values)
@@ -14,6 +14,26 @@ import logging
 logger = logging.getLogger("DataProcessor")
 
 
+def _parse_timestamps(timestamps: pd.Series) -> pd.Series:
+    """
+    Convert a timestamp column to UTC datetimes.
+
+    Native datetimes (e.g. Firestore timestamps) and consistently formatted strings are converted
+    in one vectorized call; only columns mixing several string formats fall back to the much slower
+    per-element "mixed" parser.
+
+    Args:
+        timestamps: Raw timestamp column
+
+    Returns:
+        Series of timezone-aware (UTC) datetimes
+    """
+    try:
+        return pd.to_datetime(timestamps, utc=True)
+    except (ValueError, TypeError):
+        return pd.to_datetime(timestamps, format="mixed", utc=True)
+
+
 def preprocess_pool_data(df: pd.DataFrame) -> pd.DataFrame:
     """
     Preprocess pool data to calculate derived metrics.
@@ -24,6 +44,11 @@ def preprocess_pool_data(df: pd.DataFrame) -> pd.DataFrame:
     Returns:
         DataFrame with additional derived metrics
     """
+    # Frames enriched by preprocess_all_pools (or an earlier call) already carry every derived metric.
+    # Only the explicit flag counts: raw Firestore frames already have columns with the derived names.
+    if df.attrs.get("derived_metrics"):
+        return df
+
     logger.info(f"Preprocessing pool data with {len(df)} records")
 
     try:
@@ -39,10 +64,12 @@ def preprocess_pool_data(df: pd.DataFrame) -> pd.DataFrame:
         # Ensure timestamp is in datetime format
         if "timestamp" in df.columns:
             if not pd.api.types.is_datetime64_any_dtype(df["timestamp"]):
-                df["timestamp"] = pd.to_datetime(df["timestamp"], format="mixed", utc=True)
+                df["timestamp"] = _parse_timestamps(df["timestamp"])
 
-            # Sort by timestamp to ensure proper calculation of changes
-            df = df.sort_values("timestamp")
+            # Sort by timestamp to ensure proper calculation of changes; pools split from a frame
+            # that was sorted as a whole are already in order
+            if not df["timestamp"].is_monotonic_increasing:
+                df = df.sort_values("timestamp")
 
         # Calculate market cap changes
         if "marketCap" in df.columns:
@@ -66,6 +93,75 @@ def preprocess_pool_data(df: pd.DataFrame) -> pd.DataFrame:
             first_holders = df["holders"].iloc[0] if not df.empty else 0
             df["holderGrowthFromStart"] = df["holders"] - first_holders
 
+        df.attrs["derived_metrics"] = True
+        return df
+
+    except Exception as e:
+        logger.error(f"Error calculating derived metrics: {str(e)}")
+        return df
+
+
+def preprocess_all_pools(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Calculate the derived metrics of preprocess_pool_data for every pool of a combined frame at once.
+
+    Timestamps are parsed and the frame is sorted a single time, and the per-pool changes are computed
+    with grouped pct_change/diff instead of one pass per pool. Pools taken from the result (e.g. with
+    filter_pools) are recognised by preprocess_pool_data and returned as they are.
+
+    Args:
+        df: DataFrame containing market data for one or more pools
+
+    Returns:
+        DataFrame with additional derived metrics, sorted by pool and timestamp
+    """
+    logger.info(f"Preprocessing {len(df)} records for all pools")
+
+    try:
+        df = df.copy()
+
+        # Ensure standardized column naming
+        if "poolAddress" in df.columns and "pool_address" not in df.columns:
+            df["pool_address"] = df["poolAddress"]
+        elif "pool_address" in df.columns and "poolAddress" not in df.columns:
+            df["poolAddress"] = df["pool_address"]
+
+        if "poolAddress" not in df.columns:
+            # Without a pool column the frame is treated as a single pool
+            return preprocess_pool_data(df)
+
+        # Parse timestamps once for the whole frame and sort every pool into time order
+        sort_columns = ["poolAddress"]
+        if "timestamp" in df.columns:
+            if not pd.api.types.is_datetime64_any_dtype(df["timestamp"]):
+                df["timestamp"] = _parse_timestamps(df["timestamp"])
+            sort_columns.append("timestamp")
+        df.sort_values(sort_columns, kind="stable", inplace=True, ignore_index=True)
+
+        groups = df.groupby("poolAddress", sort=False, observed=True)
+
+        # Calculate market cap changes
+        if "marketCap" in df.columns:
+            market_cap = groups["marketCap"]
+            df["marketCapChange5s"] = market_cap.pct_change() * 100
+            df["marketCapChange30s"] = market_cap.pct_change(6) * 100  # Assuming 5s intervals
+            df["marketCapChange60s"] = market_cap.pct_change(12) * 100
+
+            # Growth from the start of each pool's data
+            first_mc = _first_value_per_pool(df, groups, "marketCap")
+            df["mcGrowthFromStart"] = (((df["marketCap"] - first_mc) / first_mc) * 100).where(first_mc > 0, 0)
+
+        # Calculate holder changes
+        if "holders" in df.columns:
+            holders = groups["holders"]
+            df["holderDelta5s"] = holders.diff()
+            df["holderDelta30s"] = holders.diff(6)  # Assuming 5s intervals
+            df["holderDelta60s"] = holders.diff(12)
+
+            # Growth from the start of each pool's data
+            df["holderGrowthFromStart"] = df["holders"] - _first_value_per_pool(df, groups, "holders")
+
+        df.attrs["derived_metrics"] = True
         return df
 
     except Exception as e:
@@ -73,6 +169,26 @@ def preprocess_pool_data(df: pd.DataFrame) -> pd.DataFrame:
         return df
 
 
+def _first_value_per_pool(df: pd.DataFrame, groups, column: str) -> pd.Series:
+    """
+    Broadcast the first row's value of each pool to all rows of that pool.
+
+    Unlike groupby "first", this keeps a missing first value missing, matching iloc[0] in
+    preprocess_pool_data.
+
+    Args:
+        df: DataFrame sorted so that every pool's rows are contiguous
+        groups: df grouped by pool address with sort=False
+        column: Column to take the first value of
+
+    Returns:
+        Series aligned with df
+    """
+    first_rows = groups.cumcount().to_numpy() == 0
+    first_values = df[column].to_numpy()[first_rows]
+    return pd.Series(first_values[groups.ngroup().to_numpy()], index=df.index)
+
+
 def calculate_derived_metrics(df: pd.DataFrame) -> pd.DataFrame:
     """
     Calculate derived metrics needed for trading strategies.
@@ -132,6 +248,23 @@ def calculate_derived_metrics(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
+def _lagged(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Shift an array forward by `window` rows, padding the start with NaN (NumPy equivalent of Series.shift).
+
+    Args:
+        values: Float array
+        window: Non-negative number of rows to shift by
+
+    Returns:
+        Shifted array of the same length
+    """
+    lagged = np.full(len(values), np.nan)
+    if window < len(values):
+        lagged[window:] = values[: len(values) - window]
+    return lagged
+
+
 def calculate_metric_change(df: pd.DataFrame, metric: str, window: int) -> pd.Series:
     """
     Calculate percentage change in a metric over a time window.
@@ -144,8 +277,11 @@ def calculate_metric_change(df: pd.DataFrame, metric: str, window: int) -> pd.Se
     Returns:
         Series containing percentage changes
     """
-    # Use shift to compare with previous rows
-    return ((df[metric] / df[metric].shift(window)) - 1) * 100
+    # Compare with the value `window` rows earlier on the raw NumPy array
+    values = df[metric].to_numpy(dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        change = (values / _lagged(values, window) - 1) * 100
+    return pd.Series(change, index=df.index, name=metric)
 
 
 def calculate_holder_delta(df: pd.DataFrame, window: int) -> pd.Series:
@@ -159,7 +295,8 @@ def calculate_holder_delta(df: pd.DataFrame, window: int) -> pd.Series:
     Returns:
         Series containing holder deltas
     """
-    return df["holdersCount"] - df["holdersCount"].shift(window)
+    values = df["holdersCount"].to_numpy(dtype=np.float64)
+    return pd.Series(values - _lagged(values, window), index=df.index, name="holdersCount")
 
 
 def calculate_buy_volume(df: pd.DataFrame, window: int) -> pd.Series:
@@ -7,12 +7,18 @@ retrieve market data, and process it for backtesting.
 
 import os
 import pandas as pd
-import pytz  # type: ignore # Ignore "Library stubs not installed for pytz"
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from dotenv import load_dotenv
-from typing import Dict, Optional, List
+from google.api_core.exceptions import FailedPrecondition, ResourceExhausted
+from google.api_core.retry import Retry
+from google.cloud.firestore_v1 import Query
+from google.cloud.firestore_v1.field_path import FieldPath
+from typing import Dict, Optional, List, Tuple
 import logging
+import threading
 import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 try:
     from src.utils.firebase_utils import (
@@ -21,6 +27,7 @@ try:
         get_pool_ids,
         preprocess_market_data,
     )
+    from src.utils.rate_limiter import TokenBucket
 except ImportError:
     # Handle relative import for testing
     import sys
@@ -32,6 +39,7 @@ except ImportError:
         get_pool_ids,
         preprocess_market_data,
     )
+    from src.utils.rate_limiter import TokenBucket
 
 # Configure logging for this module
 logger = logging.getLogger("FirebaseService")
@@ -42,6 +50,97 @@ if not logger.handlers:
     handler.setFormatter(formatter)
     logger.addHandler(handler)
 
+# Market context fields that Firestore stores as numeric strings
+NUMERIC_STRING_FIELDS = [
+    "marketCap",
+    "athMarketCap",
+    "minMarketCap",
+    "maMarketCap10s",
+    "maMarketCap30s",
+    "maMarketCap60s",
+    "marketCapChange5s",
+    "marketCapChange10s",
+    "marketCapChange30s",
+    "marketCapChange60s",
+    "priceChangeFromStart",
+    "currentPrice",
+]
+
+# Fields consumed by preprocess_data; pass as `fields` to fetch only these from Firestore.
+# The simulators read further metrics (holderDelta*, buySellRatio10s, ...), so the default is all fields.
+PREPROCESS_FIELDS = [
+    "timestamp",
+    "poolAddress",
+    "holdersCount",
+    "buyVolume5s",
+    "netVolume5s",
+    "priceChangePercent",
+] + NUMERIC_STRING_FIELDS
+
+# Storage layouts of market contexts, in the order they are tried for an unknown pool:
+# marketContext/{pool_id}/marketContexts, marketContext documents with {pool_id}_timestamp IDs,
+# and marketContext documents with a poolId field. The poolId layout needs composite indexes
+# that may not be deployed yet, so it is tried last.
+POOL_LAYOUTS = ["subcol", "flat", "pool_field"]
+
+# Ends of a pool's document range, in the order get_first_and_last_document_id returns them
+DOCUMENT_BOUNDARIES = ("first", "last")
+
+# Document ID lookups are cheap single-reference reads; give up retrying them quickly instead of
+# waiting for the default 60 second retry deadline
+ID_LOOKUP_RETRY = Retry(deadline=2.0)
+ID_LOOKUP_TIMEOUT = 5.0
+
+# Process-wide state shared by all FirebaseService instances
+_DOTENV_LOADED = False
+_DB_CLIENT = None
+
+
+def _load_environment() -> None:
+    """Load .env.local once per process."""
+    global _DOTENV_LOADED
+    if _DOTENV_LOADED:
+        return
+
+    try:
+        load_dotenv(".env.local")
+        logger.info("Environment variables loaded from .env.local")
+    except Exception as e:
+        logger.warning(f"Could not load .env.local: {str(e)}")
+    _DOTENV_LOADED = True
+
+
+def _get_db():
+    """
+    Return the shared Firestore client, initializing Firebase on first use.
+
+    Firestore clients are thread-safe and expensive to create, so every FirebaseService
+    instance reuses the same client (and its gRPC channel). Failed initializations are
+    not cached so that a later instance can retry.
+    """
+    global _DB_CLIENT
+    if _DB_CLIENT is None:
+        _DB_CLIENT = initialize_firebase()
+    return _DB_CLIENT
+
+
+# Seconds that pool lists and single-pool datapoint counts are served from memory
+POOL_LIST_CACHE_TTL = 60.0
+DATAPOINT_COUNT_CACHE_TTL = 300.0
+
+# Upper bound for cached first/last document IDs; the oldest entries are evicted first
+DOC_ID_CACHE_MAX_ENTRIES = 4096
+
+# Upper bound for concurrent per-pool reads so they do not exhaust the shared gRPC channel
+MAX_FETCH_WORKERS = 32
+
+# Sustained rate (and burst size) of count aggregation queries issued in parallel
+COUNT_QUERY_QPS = 50
+
+# Exponential backoff (seconds) used when Firestore reports that a quota is exhausted
+RATE_LIMIT_INITIAL_BACKOFF = 0.05
+RATE_LIMIT_MAX_BACKOFF = 2.0
+
 
 class FirebaseService:
     """
@@ -50,37 +149,67 @@ class FirebaseService:
     without storing data in local files.
     """
 
-    def __init__(self, credential_path: Optional[str] = None):
+    def __init__(self, credential_path: Optional[str] = None, max_workers: int = 16, use_pool_index: bool = False):
         """
         Initialize FirebaseService with optional credential path.
 
         Args:
             credential_path: Path to Firebase credentials JSON file (optional)
+            max_workers: Number of pools fetched concurrently (capped at MAX_FETCH_WORKERS)
+            use_pool_index: Read first/last document IDs from poolIndex/{pool_id} summary documents
+                before querying the market contexts; only useful if the ingest side writes them
         """
         # Set credential path in environment if provided
         if credential_path:
             os.environ["FIREBASE_KEY_FILE"] = credential_path
 
         # Load environment variables
-        try:
-            load_dotenv(".env.local")
-            logger.info("Environment variables loaded from .env.local")
-        except Exception as e:
-            logger.warning(f"Could not load .env.local: {str(e)}")
+        _load_environment()
 
-        # Initialize Firebase connection using the utility function
-        self.db = initialize_firebase()
+        # Initialize Firebase connection using the utility function (shared across instances)
+        self.db = _get_db()
         if self.db:
             logger.info("Firebase initialized successfully")
         else:
             logger.warning("Failed to initialize Firebase - some functionality may be limited")
 
+        self.max_workers = max(1, min(max_workers, MAX_FETCH_WORKERS))
+        self.use_pool_index = use_pool_index
+        self._count_rate_limiter = TokenBucket(capacity=COUNT_QUERY_QPS, refill_rate=COUNT_QUERY_QPS)
+
+        # pool_id -> (monotonic time stored, (first document ID, last document ID))
+        self._doc_id_cache: Dict[str, Tuple[float, Tuple[Optional[str], Optional[str]]]] = {}
+        self._doc_id_cache_ttl = 60.0
+        self._doc_id_cache_lock = threading.Lock()
+
+        # Storage layout per pool (one of POOL_LAYOUTS) and the layout shared by all pools seen so far
+        self._pool_layout: Dict[str, str] = {}
+        self._pool_layout_counts: Counter = Counter()
+        self._default_layout: Optional[str] = None
+        self._pool_layout_lock = threading.Lock()
+
+        # Set once a poolId query fails for a missing composite index; the layout is skipped from then on
+        self._pool_field_index_missing = False
+
+        # Shared pool for running a pool's first and last ID queries side by side. Threads are started
+        # on demand, and reusing them avoids an executor per pool inside get_first_and_last_document_ids.
+        self._id_lookup_executor = ThreadPoolExecutor(max_workers=MAX_FETCH_WORKERS, thread_name_prefix="id-lookup")
+
+        # pool_id -> marketContext/{pool_id}/marketContexts collection reference, capped like _doc_id_cache
+        self._contexts_refs: Dict[str, object] = {}
+        self._contexts_refs_lock = threading.Lock()
+
+        # ("pools", limit) or ("count", pool_id) -> (monotonic time stored, cached value)
+        self._pool_cache: Dict[tuple, Tuple[float, object]] = {}
+
     def fetch_market_data(
         self,
         min_data_points: int = 20,
         max_pools: int = 10,
         limit_per_pool: int = 100,
         pool_address: Optional[str] = None,
+        fields: Optional[List[str]] = None,
+        since: Optional[datetime] = None,
     ) -> Dict[str, pd.DataFrame]:
         """
         Fetch market data from Firebase.
@@ -90,6 +219,8 @@ class FirebaseService:
             max_pools: Maximum number of pools to fetch data for
             limit_per_pool: Maximum number of data points to fetch per pool
             pool_address: Optional specific pool address to fetch data for
+            fields: Optional list of fields to fetch (e.g. PREPROCESS_FIELDS); None fetches all fields
+            since: Optional datetime; only data points with a timestamp at or after it are fetched
 
         Returns:
             Dictionary mapping pool IDs to their respective DataFrames
@@ -105,7 +236,12 @@ class FirebaseService:
             if pool_address:
                 logger.info(f"Fetching data for specific pool: {pool_address}")
                 df = fetch_market_data_for_pool(
-                    self.db, pool_address, limit=limit_per_pool, min_data_points=min_data_points
+                    self.db,
+                    pool_address,
+                    limit=limit_per_pool,
+                    min_data_points=min_data_points,
+                    fields=fields,
+                    since=since,
                 )
 
                 if df is not None:
@@ -118,15 +254,34 @@ class FirebaseService:
                 pool_ids = get_pool_ids(self.db, limit=max_pools)
                 logger.info(f"Found {len(pool_ids)} pools, fetching data...")
 
-                result = {}
-                for pool_id in pool_ids:
+                # Skip pools that cannot reach min_data_points before streaming their documents.
+                # Count lookups are billed per 1000 index entries (or one read per status document),
+                # which is far cheaper than a full read of a pool that would be discarded anyway.
+                if min_data_points > 1 and pool_ids:
+                    counts = self.get_pools_datapoints_counts(pool_ids)
+                    pool_ids = [
+                        pool_id for pool_id in pool_ids if counts.get(pool_id, min_data_points) >= min_data_points
+                    ]
+                    logger.info(f"{len(pool_ids)} pools have at least {min_data_points} datapoints")
+
+                # Pools are independent network reads, so fetch them concurrently
+                def fetch_pool(pool_id: str) -> Optional[pd.DataFrame]:
                     df = fetch_market_data_for_pool(
-                        self.db, pool_id, limit=limit_per_pool, min_data_points=min_data_points
+                        self.db,
+                        pool_id,
+                        limit=limit_per_pool,
+                        min_data_points=min_data_points,
+                        fields=fields,
+                        since=since,
                     )
+                    return preprocess_market_data(df) if df is not None else None
 
-                    if df is not None:
-                        df = preprocess_market_data(df)
-                        result[pool_id] = df
+                result = {}
+                if pool_ids:
+                    with ThreadPoolExecutor(max_workers=min(self.max_workers, len(pool_ids))) as executor:
+                        for pool_id, df in zip(pool_ids, executor.map(fetch_pool, pool_ids)):
+                            if df is not None:
+                                result[pool_id] = df
 
             elapsed_time = time.time() - start_time
             logger.info(f"Fetched {len(result)} pools in {elapsed_time:.2f} seconds")
@@ -152,21 +307,9 @@ class FirebaseService:
         """
         logger.info(f"Fetching recent market data from the past {hours_back} hours")
 
-        # Fetch all data first
-        all_data = self.fetch_market_data(min_data_points=min_data_points, max_pools=max_pools)
-
-        if not all_data:
-            return {}
-
-        # Filter for recent data
-        cutoff_time = datetime.now() - timedelta(hours=hours_back)
-
-        result = {}
-        for pool_id, df in all_data.items():
-            if "timestamp" in df.columns:
-                recent_df = df[df["timestamp"] >= cutoff_time]
-                if len(recent_df) >= min_data_points:
-                    result[pool_id] = recent_df
+        # Let Firestore apply the cutoff on its timestamp index so only the recent slice is transferred
+        cutoff_time = datetime.now(tz=timezone.utc) - timedelta(hours=hours_back)
+        result = self.fetch_market_data(min_data_points=min_data_points, max_pools=max_pools, since=cutoff_time)
 
         logger.info(f"Found {len(result)} pools with recent data")
         return result
@@ -185,33 +328,59 @@ class FirebaseService:
             logger.error("Firebase not initialized, cannot get available pools")
             return []
 
+        # The pool list changes on a scale of minutes, so repeat calls within the TTL are served from memory
+        cache_key = ("pools", limit)
+        cached = self._pool_cache.get(cache_key)
+        if cached and time.monotonic() - cached[0] < POOL_LIST_CACHE_TTL:
+            return list(cached[1])
+
         try:
-            return get_pool_ids(self.db, limit=limit)
+            pool_ids = get_pool_ids(self.db, limit=limit)
         except Exception as e:
             logger.error(f"Error getting available pools: {str(e)}")
             return []
 
+        if pool_ids:
+            self._pool_cache[cache_key] = (time.monotonic(), list(pool_ids))
+        return pool_ids
+
+    def refresh(self) -> None:
+        """Drop all cached pool lists, datapoint counts and document IDs so the next calls query Firestore."""
+        self._pool_cache.clear()
+        self.invalidate_doc_id_cache()
+
     def preprocess_data(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         Preprocess the market data for backtesting
 
         Args:
-            df: Raw market data DataFrame
+            df: Raw market data DataFrame (left unchanged)
 
         Returns:
             Preprocessed DataFrame ready for backtesting
         """
+        # Frames that already went through this pipeline are returned as is
+        if df.attrs.get("firebase_service_preprocessed"):
+            return df
+
         logger.info("Preprocessing market data...")
 
+        # Work on one copy so the caller's frame keeps its row order and dtypes; the steps below
+        # then sort and convert that copy in place
+        df = df.copy()
+
         # Ensure timestamp is in datetime format
         if "timestamp" in df.columns and not pd.api.types.is_datetime64_any_dtype(df["timestamp"]):
             df["timestamp"] = pd.to_datetime(df["timestamp"], utc=True)
 
-        # Sort by pool and timestamp
-        if "poolAddress" in df.columns:
-            df = df.sort_values(["poolAddress", "timestamp"])
+        # Sort by pool and timestamp in place to avoid another full-frame copy. Single-pool frames
+        # (the common case from fetch_pool_data) only need the timestamp key; for several pools the
+        # addresses are sorted as categorical codes instead of comparing strings.
+        if "poolAddress" in df.columns and df["poolAddress"].nunique() > 1:
+            df["poolAddress"] = df["poolAddress"].astype("category")
+            df.sort_values(["poolAddress", "timestamp"], inplace=True, ignore_index=True)
         else:
-            df = df.sort_values("timestamp")
+            df.sort_values("timestamp", inplace=True, ignore_index=True, kind="mergesort")
 
         # Litistä sisäkkäiset rakenteet riveittäin
         if not df.empty:
@@ -271,10 +440,10 @@ class FirebaseService:
             "priceChangePercent",
         ]
 
-        # Fill NA values with 0 for numeric columns
-        for col in numeric_columns:
-            if col in df.columns:
-                df[col] = df[col].fillna(0)
+        # Fill NA values with 0 for numeric columns in a single pass
+        fill_values = {col: 0 for col in numeric_columns if col in df.columns}
+        if fill_values:
+            df.fillna(fill_values, inplace=True)
 
         # Varmista, että volume-kentät säilyvät sopivassa muodossa
         volume_fields = [col for col in df.columns if "volume" in col.lower()]
@@ -291,16 +460,22 @@ class FirebaseService:
         # Calculate additional derived metrics if needed
         # This will be expanded based on requirements
 
+        df.attrs["firebase_service_preprocessed"] = True
+
         logger.info(f"Preprocessing complete. DataFrame shape: {df.shape}")
         return df
 
-    def fetch_pool_data(self, pool_address: str, collection_name: str = "marketContext") -> pd.DataFrame:
+    def fetch_pool_data(
+        self, pool_address: str, collection_name: str = "marketContext", fields: Optional[List[str]] = None
+    ) -> pd.DataFrame:
         """
         Fetch data for a specific pool
 
         Args:
             pool_address: The pool address to fetch data for
             collection_name: The Firestore collection name for market contexts
+            fields: Optional list of top-level fields to fetch (e.g. PREPROCESS_FIELDS); None fetches
+                whole documents, which is required for nested Pool 1 format documents
 
         Returns:
             DataFrame containing pool data
@@ -314,67 +489,54 @@ class FirebaseService:
             # Get the pool document
             pool_doc = self.db.collection(collection_name).document(pool_address)
 
-            # Fetch all market contexts for this pool
-            contexts = pool_doc.collection("marketContexts").order_by("timestamp").get()
+            # Stream all market contexts for this pool; ordering is done by preprocess_data
+            contexts_query = pool_doc.collection("marketContexts")
+            if fields:
+                # Projection: only the requested fields are sent over the wire
+                contexts_query = contexts_query.select(fields)
+            contexts = contexts_query.stream()
 
-            pool_contexts = []
+            # Accumulate values column by column instead of building a list of row dicts
+            columns: Dict[str, list] = {}
+            row_count = 0
             for context in contexts:
                 data = context.to_dict()
 
-                # Convert string numbers to floats (same as in fetch_market_data)
-                for key in [
-                    "marketCap",
-                    "athMarketCap",
-                    "minMarketCap",
-                    "maMarketCap10s",
-                    "maMarketCap30s",
-                    "maMarketCap60s",
-                    "marketCapChange5s",
-                    "marketCapChange10s",
-                    "marketCapChange30s",
-                    "marketCapChange60s",
-                    "priceChangeFromStart",
-                ]:
-                    if key in data and isinstance(data[key], str):
-                        try:
-                            data[key] = float(data[key])
-                        except (ValueError, TypeError):
-                            data[key] = 0.0
-
-                # Convert timestamp
-                if "timestamp" in data:
-                    try:
-                        if isinstance(data["timestamp"], (int, float)):
-                            data["timestamp"] = datetime.fromtimestamp(data["timestamp"] / 1000).replace(
-                                tzinfo=pytz.UTC
-                            )
-                        elif isinstance(data["timestamp"], str):
-                            data["timestamp"] = datetime.fromtimestamp(float(data["timestamp"]) / 1000).replace(
-                                tzinfo=pytz.UTC
-                            )
-                    except Exception:
-                        # Skip invalid timestamps
-                        continue
-
-                # Convert currentPrice to float if it's a string
-                if "currentPrice" in data and isinstance(data["currentPrice"], str):
-                    try:
-                        data["currentPrice"] = float(data["currentPrice"])
-                    except (ValueError, TypeError):
-                        data["currentPrice"] = 0.0
-
                 # Normalize pool data structure (Pool 1 format -> Pool 2 format)
                 data = self.normalize_pool_format(data)
 
                 data["poolAddress"] = pool_address
-                pool_contexts.append(data)
-
-            if not pool_contexts:
+                for key, value in data.items():
+                    column = columns.get(key)
+                    if column is None:
+                        # Backfill rows seen before this field first appeared
+                        column = columns[key] = [None] * row_count
+                    column.append(value)
+                row_count += 1
+
+                # Pad fields missing from this document; documents with the full field set skip the scan
+                if len(data) < len(columns):
+                    for column in columns.values():
+                        if len(column) < row_count:
+                            column.append(None)
+
+            if not row_count:
                 logger.warning(f"No data found for pool {pool_address}")
                 return pd.DataFrame()
 
             # Create DataFrame
-            df = pd.DataFrame(pool_contexts)
+            df = pd.DataFrame(columns)
+
+            # Convert string numbers to floats column-wise; unparseable values become 0.0
+            numeric_fields = [col for col in NUMERIC_STRING_FIELDS if col in df.columns]
+            if numeric_fields:
+                df[numeric_fields] = df[numeric_fields].apply(pd.to_numeric, errors="coerce").fillna(0.0)
+
+            # Convert millisecond timestamps for the whole column at once and skip invalid rows
+            if "timestamp" in df.columns:
+                df["timestamp"] = self._parse_epoch_ms(df["timestamp"])
+                df = df.dropna(subset=["timestamp"])
+
             logger.info(f"Loaded {len(df)} data points for pool {pool_address}")
 
             # Return preprocessed data
@@ -384,6 +546,33 @@ class FirebaseService:
             logger.error(f"Error fetching data for pool {pool_address}: {str(e)}")
             return pd.DataFrame()  # Return empty DataFrame on error
 
+    @staticmethod
+    def _parse_epoch_ms(timestamps: pd.Series) -> pd.Series:
+        """
+        Convert a column of millisecond epoch timestamps to UTC datetimes.
+
+        Numeric values and numeric strings are converted in one vectorized call.
+        Values that are already datetimes are kept, anything else becomes NaT.
+
+        Args:
+            timestamps: Raw timestamp column
+
+        Returns:
+            Series of timezone-aware (UTC) datetimes
+        """
+        if pd.api.types.is_datetime64_any_dtype(timestamps):
+            return timestamps
+
+        epoch_ms = pd.to_numeric(timestamps, errors="coerce")
+        parsed = pd.to_datetime(epoch_ms, unit="ms", utc=True)
+
+        # Keep native datetime values (e.g. Firestore timestamps) as they are
+        not_numeric = epoch_ms.isna() & timestamps.notna()
+        if not_numeric.any():
+            parsed[not_numeric] = pd.to_datetime(timestamps[not_numeric], utc=True, errors="coerce")
+
+        return parsed
+
     def normalize_pool_format(self, data: dict) -> dict:
         """
         Normalize pool data format from Pool 1 (flat) to Pool 2 (nested) structure.
@@ -395,16 +584,16 @@ class FirebaseService:
             data: Dictionary containing pool data
 
         Returns:
-            Dictionary with normalized structure (Pool 2 format)
+            Dictionary with normalized structure (Pool 2 format); the input itself if no conversion is needed
         """
-        result = data.copy()
-
         # Check if this is Pool 1 format by looking for keys with 'trade_last' prefix
         pool1_keys = [k for k in data.keys() if k.startswith("trade_last") and "." in k]
 
         if not pool1_keys:
-            # Already Pool 2 format or no trade data, return as is
-            return result
+            # Already Pool 2 format or no trade data, return as is without copying
+            return data
+
+        result = data.copy()
 
         logger.info(f"Detected Pool 1 format with {len(pool1_keys)} trade fields. Converting to Pool 2 format.")
 
@@ -537,7 +726,7 @@ class FirebaseService:
             pool_ids: List of pool IDs to check
 
         Returns:
-            Dict mapping pool_id to datapoint count
+            Dict mapping pool_id to datapoint count; pools whose count could not be read are left out
         """
         if not self.db:
             logger.error("Firebase not initialized, cannot get datapoints counts")
@@ -549,42 +738,44 @@ class FirebaseService:
         if not pool_ids:
             return result
 
+        # Read the cached counts of all pools with one batched request
         try:
-            # Process pools in batches of 10 for efficiency (adjust based on Firebase rate limits)
-            batch_size = 20  # Increased batch size for faster processing (adjust if rate limit issues occur)
-            logger.info(f"Processing {len(pool_ids)} pools in batches of {batch_size}")
+            result.update(self._get_status_datapoints_counts(pool_ids))
+        except Exception as e:
+            logger.warning(f"Could not read status documents, counting pools individually: {e}")
 
-            for i in range(0, len(pool_ids), batch_size):
-                batch_ids = pool_ids[i : i + batch_size]
-                logger.debug(f"Processing batch {i//batch_size + 1} with {len(batch_ids)} pools")
+        misses = [pool_id for pool_id in pool_ids if pool_id not in result]
+        if not misses:
+            return result
 
-                # Process batch with some delay between pools to avoid rate limiting
-                for pool_id in batch_ids:
-                    try:
-                        count = self._get_single_pool_datapoints_count(pool_id)
-                        result[pool_id] = count
+        # Count the remaining pools in parallel; the token bucket keeps the fan-out under the QPS ceiling
+        logger.info(f"Counting datapoints of {len(misses)} pools without a cached count")
 
-                        # Small delay to avoid Firebase rate limits
-                        time.sleep(0.1)
+        def count_pool(pool_id: str) -> int:
+            self._count_rate_limiter.acquire()
+            return self._count_pool_datapoints_with_backoff(pool_id)
 
-                    except Exception as e:
-                        logger.error(f"Error getting datapoints count for pool {pool_id}: {e}")
-                        result[pool_id] = 0
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(misses))) as executor:
+            futures = {executor.submit(count_pool, pool_id): pool_id for pool_id in misses}
+            for completed, future in enumerate(as_completed(futures), start=1):
+                pool_id = futures[future]
+                try:
+                    result[pool_id] = future.result()
+                except Exception as e:
+                    # Leave the pool out rather than reporting 0, so a transient error does not drop it
+                    logger.error(f"Error getting datapoints count for pool {pool_id}: {e}")
 
                 # Log progress periodically
-                if (i // batch_size) % 5 == 0 or i + batch_size >= len(pool_ids):
-                    logger.info(f"Processed {min(i+batch_size, len(pool_ids))} of {len(pool_ids)} pools")
+                if completed % 100 == 0 or completed == len(misses):
+                    logger.info(f"Counted {completed} of {len(misses)} pools")
 
-            return result
-
-        except Exception as e:
-            logger.error(f"Error getting datapoints counts: {e}")
-            return result  # Return partial results even on error
+        return result
 
     def _get_single_pool_datapoints_count(self, pool_id: str) -> int:
         """
         Internal method to get the number of datapoints for a single pool.
-        First tries to find the count directly from document fields, then falls back to counting documents.
+        Uses the cached dataPointCount from the marketContextStatus document when available,
+        otherwise counts the documents in the pool's marketContexts subcollection.
 
         Args:
             pool_id: Pool ID to check
@@ -592,276 +783,83 @@ class FirebaseService:
         Returns:
             Integer count of datapoints
         """
-        try:
-            logger.debug(f"Starting datapoint calculation for pool {pool_id}")
+        # Counts change slowly, so repeat calls within the TTL are served from memory
+        cache_key = ("count", pool_id)
+        cached = self._pool_cache.get(cache_key)
+        if cached and time.monotonic() - cached[0] < DATAPOINT_COUNT_CACHE_TTL:
+            return cached[1]
 
-            # Now that we know the exact path, check it first: /marketContext/[pool-id]/marketContexts/
-            logger.debug(f"Checking exact path directly /marketContext/{pool_id}/marketContexts/")
-            try:
-                # This refers directly to the marketContexts subcollection under the document
-                collection_ref = self.db.collection("marketContext").document(pool_id).collection("marketContexts")
+        try:
+            status_counts = self._get_status_datapoints_counts([pool_id])
+            if pool_id in status_counts:
+                count = status_counts[pool_id]
+            else:
+                count = self._count_pool_datapoints(pool_id)
 
-                # First try to fetch one document to make sure the collection exists
-                try:
-                    # Fetch one document from the collection
-                    docs = list(collection_ref.limit(1).stream())
-                    if docs and len(docs) > 0:
-                        logger.debug(f"Found document at path /marketContext/{pool_id}/marketContexts/: {docs[0].id}")
-
-                        # Now that we know the collection exists, try to count the documents
-                        try:
-                            # Try count API if available
-                            if hasattr(collection_ref, "count") and callable(getattr(collection_ref, "count")):
-                                count_query = collection_ref.count()
-                                count_result = count_query.get()
-                                if (
-                                    hasattr(count_result, "__len__")
-                                    and len(count_result) > 0
-                                    and hasattr(count_result[0], "value")
-                                ):
-                                    data_count = count_result[0].value
-                                    logger.debug(
-                                        f"Found {data_count} datapoints for pool {pool_id} from path /marketContext/{pool_id}/marketContexts/ using count API"
-                                    )
-                                    return data_count
-                        except Exception as e:
-                            logger.debug(f"Count API failed, switching to alternative calculation: {e}")
-
-                        # If count API doesn't work, fetch all documents and count them (limited amount)
-                        docs_all = list(collection_ref.limit(5000).stream())
-                        data_count = len(docs_all)
-                        logger.debug(
-                            f"Found {data_count} datapoints for pool {pool_id} from path /marketContext/{pool_id}/marketContexts/ using stream method"
-                        )
-
-                        # Show the first document's content for debugging
-                        if data_count > 0:
-                            first_doc = docs_all[0].to_dict()
-                            logger.debug(f"First datapoint information: {first_doc}")
-
-                        # If datapoints were found, return the count
-                        return data_count
-                    else:
-                        logger.debug(f"No documents found at path /marketContext/{pool_id}/marketContexts/")
-                except Exception as e:
-                    logger.debug(f"Error fetching documents from path /marketContext/{pool_id}/marketContexts/: {e}")
-            except Exception as e:
-                logger.debug(f"Error checking path /marketContext/{pool_id}/marketContexts/: {e}")
+        except Exception as e:
+            logger.error(f"Error calculating datapoints for pool {pool_id}: {e}")
+            return 0
 
-            # Try also to fetch a specific example directly
-            test_path = f"marketContext/{pool_id}/marketContexts/marketContext_1741819702"
-            logger.debug(f"Trying to fetch a direct example document: {test_path}")
-            try:
-                # Separate the path parts
-                parts = test_path.split("/")
-                if len(parts) >= 4:  # At least 4 parts: collection/document/subcollection/document
-                    collection_name = parts[0]
-                    document_id = parts[1]
-                    subcollection_name = parts[2]
-                    subdocument_id = parts[3]
-
-                    # Fetch the document
-                    doc_ref = self.db.collection(collection_name).document(document_id)
-                    subdoc_ref = doc_ref.collection(subcollection_name).document(subdocument_id)
-                    doc = subdoc_ref.get()
-
-                    if doc.exists:
-                        logger.debug(f"Found direct example document: {test_path}")
-                        logger.debug(f"Document content: {doc.to_dict()}")
-                        # If one document was found, the path is likely correct and we can try to count all
-                        collection_ref = doc_ref.collection(subcollection_name)
-                        docs_all = list(collection_ref.limit(5000).stream())
-                        data_count = len(docs_all)
-                        logger.debug(
-                            f"Found {data_count} datapoints for pool {pool_id} from path /{collection_name}/{document_id}/{subcollection_name}/ using stream method"
-                        )
-                        return data_count
-                    else:
-                        logger.debug(f"Example document not found: {test_path}")
-            except Exception as e:
-                logger.debug(f"Error fetching example document {test_path}: {e}")
+        self._pool_cache[cache_key] = (time.monotonic(), count)
+        return count
 
-            # 3. Specifically check the "marketContextStatus" collection
+    def _get_status_datapoints_counts(self, pool_ids: List[str]) -> Dict[str, int]:
+        """
+        Read the cached dataPointCount of several pools from their marketContextStatus documents.
+        All status documents are fetched with a single batched get_all request.
 
-            # If we didn't find data from the exact path, use the older search method
-            pool_doc_ref = None
-            found_in = None
+        Args:
+            pool_ids: Pool IDs to look up
 
-            # 1. Check from "marketContext" collection (singular form)
-            try:
-                pool_doc_ref = self.db.collection("marketContext").document(pool_id)
-                pool_doc = pool_doc_ref.get()
-                if pool_doc.exists:
-                    found_in = "marketContext"
-                    logger.debug(f"Pool {pool_id} found in 'marketContext' collection")
-                else:
-                    logger.debug(f"Pool {pool_id} not found in 'marketContext' collection")
-            except Exception as e:
-                logger.debug(f"Error when checking pool {pool_id} in marketContext collection: {e}")
+        Returns:
+            Dict mapping pool_id to datapoint count for pools that have a cached count
+        """
+        refs = [self.db.collection("marketContextStatus").document(pool_id) for pool_id in pool_ids]
 
-            # 2. If not found, check from "marketContexts" collection (plural form)
-            if not found_in:
-                try:
-                    pool_doc_ref = self.db.collection("marketContexts").document(pool_id)
-                    pool_doc = pool_doc_ref.get()
-                    if pool_doc.exists:
-                        found_in = "marketContexts"
-                        logger.debug(f"Pool {pool_id} found in 'marketContexts' collection")
-                    else:
-                        logger.debug(f"Pool {pool_id} not found in 'marketContexts' collection")
-                except Exception as e:
-                    logger.debug(f"Error when checking pool {pool_id} in marketContexts collection: {e}")
+        counts: Dict[str, int] = {}
+        # Only the count field is transferred and decoded
+        for snapshot in self.db.get_all(refs, field_paths=["dataPointCount"]):
+            if not snapshot.exists:
+                continue
+            data_count = (snapshot.to_dict() or {}).get("dataPointCount")
+            if data_count is not None:
+                counts[snapshot.id] = data_count
 
-            # 3. Specifically check the "marketContextStatus" collection
-            if not found_in:
-                try:
-                    pool_doc_ref = self.db.collection("marketContextStatus").document(pool_id)
-                    pool_doc = pool_doc_ref.get()
-                    if pool_doc.exists:
-                        found_in = "marketContextStatus"
-                        logger.debug(f"Pool {pool_id} found in 'marketContextStatus' collection")
-
-                        # Check if the document has a dataPointCount field
-                        doc_data = pool_doc.to_dict()
-                        if doc_data and "dataPointCount" in doc_data:
-                            data_count = doc_data["dataPointCount"]
-                            logger.debug(
-                                f"Pool {pool_id} dataPointCount: {data_count} (directly from marketContextStatus document)"
-                            )
-                            return data_count
-
-                        # Check other possible fields referring to datapoints
-                        possible_fields = ["totalDataPoints", "pointCount", "dataPoints", "count"]
-                        for field in possible_fields:
-                            if doc_data and field in doc_data:
-                                data_count = doc_data[field]
-                                logger.debug(
-                                    f"Pool {pool_id} {field}: {data_count} (directly from marketContextStatus document)"
-                                )
-                                return data_count
-
-                        # Check lastUpdate object fields
-                        if doc_data and "lastUpdate" in doc_data and isinstance(doc_data["lastUpdate"], dict):
-                            last_update = doc_data["lastUpdate"]
-                            if "dataPointCount" in last_update:
-                                data_count = last_update["dataPointCount"]
-                                logger.debug(f"Pool {pool_id} lastUpdate.dataPointCount: {data_count}")
-                                return data_count
-                            # Also check totalPoints
-                            if "totalPoints" in last_update:
-                                data_count = last_update["totalPoints"]
-                                logger.debug(f"Pool {pool_id} lastUpdate.totalPoints: {data_count}")
-                                return data_count
-                            # Also check pointCount
-                            if "pointCount" in last_update:
-                                data_count = last_update["pointCount"]
-                                logger.debug(f"Pool {pool_id} lastUpdate.pointCount: {data_count}")
-
-                        # Print the entire document content for debugging
-                        logger.debug(f"Pool {pool_id} marketContextStatus document content: {doc_data}")
+        return counts
 
-                    else:
-                        logger.debug(f"Pool {pool_id} not found in 'marketContextStatus' collection")
-                except Exception as e:
-                    logger.debug(f"Error when checking pool {pool_id} in marketContextStatus collection: {e}")
+    def _count_pool_datapoints(self, pool_id: str) -> int:
+        """
+        Count the documents in the marketContexts subcollection of a pool.
 
-            # 4. If not found in previous collections, try to search in nested collections
-            if not found_in:
-                try:
-                    logger.debug(f"Searching for pool {pool_id} in other collections")
-                    collections = list(self.db.collections())
-                    logger.debug(f"Firebase has {len(collections)} collections: {[c.id for c in collections]}")
-
-                    for collection in collections:
-                        if collection.id not in ["marketContext", "marketContexts", "marketContextStatus"]:
-                            # Try if the pool is in this collection
-                            try:
-                                doc_ref = collection.document(pool_id)
-                                doc = doc_ref.get()
-                                if doc.exists:
-                                    logger.debug(f"Pool {pool_id} document found in collection {collection.id}")
-
-                                    # Check if the document contains datapoint count
-                                    doc_data = doc.to_dict()
-                                    if doc_data and "dataPointCount" in doc_data:
-                                        data_count = doc_data["dataPointCount"]
-                                        logger.debug(
-                                            f"Pool {pool_id} dataPointCount: {data_count} (directly from {collection.id} document)"
-                                        )
-                                        return data_count
-
-                                    # Try if this document has marketContexts subcollection
-                                    market_col = doc_ref.collection("marketContexts")
-                                    market_docs = list(market_col.limit(1).stream())
-                                    if market_docs:
-                                        pool_doc_ref = doc_ref
-                                        found_in = f"{collection.id} (with marketContexts subcollection)"
-                                        logger.debug(f"Pool {pool_id} found in collection {found_in}")
-                                        break
-                                    else:
-                                        logger.debug(
-                                            f"Pool {pool_id} found in collection {collection.id}, but marketContexts subcollection is empty"
-                                        )
-                            except Exception as e:
-                                logger.debug(f"Error when checking pool {pool_id} from collection {collection.id}: {e}")
-                except Exception as e:
-                    logger.debug(f"Error examining nested collections for pool {pool_id}: {e}")
+        Args:
+            pool_id: Pool ID to count
 
-            # If the pool is not found in any collection that would contain datapoints
-            if not found_in:
-                logger.debug(f"Pool {pool_id} not found in any collection that would contain datapoints")
-                return 0
+        Returns:
+            Integer count of datapoints
+        """
+        # Server-side count aggregation returns a single number instead of the documents
+        return self._contexts_ref(pool_id).count(alias="n").get()[0][0].value
 
-            # Fetch subcollection "marketContexts" - this has been modified to match the fetch_market_data_for_pool function
-            logger.debug(f"Fetching subcollection 'marketContexts' for pool {pool_id} from collection {found_in}")
-            collection_ref = pool_doc_ref.collection("marketContexts")
+    def _count_pool_datapoints_with_backoff(self, pool_id: str) -> int:
+        """
+        Count the datapoints of a pool, retrying with exponential backoff on rate limit errors.
 
-            # Support both count() API and fallback alternative
-            try:
-                # Some Firebase SDK versions have direct count() support
-                if hasattr(collection_ref, "count") and callable(getattr(collection_ref, "count")):
-                    logger.debug(f"Using count() API for pool {pool_id}")
-                    count_query = collection_ref.count()
-                    count_result = count_query.get()
-
-                    # Extract count from the result
-                    logger.debug(f"Count API result: {count_result}")
-                    if hasattr(count_result, "__len__") and len(count_result) > 0 and hasattr(count_result[0], "value"):
-                        data_count = count_result[0].value
-                        logger.debug(
-                            f"Found {data_count} datapoints for pool {pool_id} from collection {found_in} using count API"
-                        )
-                        return data_count
-                    else:
-                        logger.debug(f"Count API returned empty or invalid result: {count_result}")
-                else:
-                    logger.debug(f"Count API is not available for pool {pool_id}, using alternative method")
-            except Exception as e:
-                logger.debug(f"Count API failed for pool {pool_id}, reason: {e}")
+        Args:
+            pool_id: Pool ID to count
 
-            # Alternative method: Fetch limited number of documents and check the count
+        Returns:
+            Integer count of datapoints
+        """
+        backoff = RATE_LIMIT_INITIAL_BACKOFF
+        while True:
             try:
-                logger.debug(f"Using document stream method for pool {pool_id}")
-                # Fetch only 5000 documents to keep the query time reasonable
-                docs = list(collection_ref.limit(5000).stream())
-                data_count = len(docs)
-                logger.debug(
-                    f"Found {data_count} datapoints for pool {pool_id} from collection {found_in} using stream method"
-                )
-
-                # If datapoints were found, print information about the first document
-                if data_count > 0:
-                    first_doc = docs[0].to_dict()
-                    logger.debug(f"First datapoint information: {first_doc}")
-
-                return data_count
-            except Exception as e:
-                logger.error(f"Error in stream method for pool {pool_id}: {e}")
-                return 0
-
-        except Exception as e:
-            logger.error(f"Total error when calculating datapoints for pool {pool_id}: {e}")
-            return 0
+                return self._count_pool_datapoints(pool_id)
+            except ResourceExhausted:
+                if backoff > RATE_LIMIT_MAX_BACKOFF:
+                    raise
+                logger.warning(f"Firestore rate limit hit for pool {pool_id}, retrying in {backoff:.2f}s")
+                time.sleep(backoff)
+                backoff *= 2
 
     def get_first_and_last_document_id(self, pool_id: str) -> tuple:
         """
@@ -878,141 +876,367 @@ class FirebaseService:
             logger.error("Firebase not initialized, cannot get document IDs")
             return None, None
 
+        # Repeat lookups within the TTL are served from memory
+        cached = self._doc_id_cache.get(pool_id)
+        if cached and time.monotonic() - cached[0] < self._doc_id_cache_ttl:
+            return cached[1]
+
         try:
-            # First try to fetch from marketContext/{pool_id}/marketContexts collection
-            contexts_ref = self.db.collection("marketContext").document(pool_id).collection("marketContexts")
+            doc_ids = self._lookup_first_and_last_document_id(pool_id)
+        except Exception as e:
+            logger.error(f"Error retrieving document IDs for pool {pool_id}: {e}")
+            return None, None
 
-            # Check if data exists at this path
-            test_docs = list(contexts_ref.limit(1).stream())
+        with self._doc_id_cache_lock:
+            # Re-insert so that the dict stays ordered from the oldest to the newest lookup
+            self._doc_id_cache.pop(pool_id, None)
+            self._doc_id_cache[pool_id] = (time.monotonic(), doc_ids)
+            while len(self._doc_id_cache) > DOC_ID_CACHE_MAX_ENTRIES:
+                del self._doc_id_cache[next(iter(self._doc_id_cache))]
+        return doc_ids
 
-            # If not found, try directly the marketContext collection
-            if not test_docs:
-                logger.debug(
-                    f"No data found at path marketContext/{pool_id}/marketContexts, trying directly marketContext"
-                )
-                # Try marketContext collection, where IDs can be in the format {pool_id}_timestamp
-                contexts_ref = self.db.collection("marketContext")
-
-                # Get the first document in chronological order (oldest first)
-                # Find documents where ID starts with poolID
-                prefix = f"{pool_id}_"
-                first_doc_query = (
-                    contexts_ref.where("__name__", ">=", prefix)
-                    .where("__name__", "<=", prefix + "\uf8ff")
-                    .order_by("__name__")
-                    .limit(1)
-                )
-                first_docs = list(first_doc_query.stream())
+    def get_first_and_last_document_ids(self, pool_ids: List[str], max_concurrency: int = 16) -> Dict[str, tuple]:
+        """
+        Fetch the first and last market context document IDs for many pools concurrently.
 
-                if not first_docs:
-                    logger.debug(f"No first document found for pool {pool_id} directly from marketContext collection")
-                    return None, None
+        Args:
+            pool_ids: Pool IDs to look up
+            max_concurrency: Maximum number of pools looked up at the same time
 
-                first_doc = first_docs[0]
-                first_id = first_doc.id
+        Returns:
+            Dict mapping pool_id to (first document ID, last document ID)
+        """
+        if not pool_ids:
+            return {}
 
-                # Get the last document (newest)
-                try:
-                    from google.cloud.firestore_v1 import Query
+        with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(pool_ids)))) as executor:
+            doc_ids = executor.map(self.get_first_and_last_document_id, pool_ids)
+            return dict(zip(pool_ids, doc_ids))
 
-                    last_doc_query = (
-                        contexts_ref.where("__name__", ">=", prefix)
-                        .where("__name__", "<=", prefix + "\uf8ff")
-                        .order_by("__name__", direction=Query.DESCENDING)
-                        .limit(1)
-                    )
-                except (ImportError, AttributeError):
-                    # If it's not available, use the string directly
-                    last_doc_query = contexts_ref.order_by("timestamp", direction="DESCENDING").limit(1)
+    def iter_first_and_last_document_ids(self, pool_ids: List[str], batch_size: int = DOC_ID_CACHE_MAX_ENTRIES):
+        """
+        Yield the first and last document IDs of many pools, looked up concurrently in batches.
 
-                last_docs = list(last_doc_query.stream())
+        Callers that do slow per-pool work (e.g. exact counts) should use the yielded IDs instead of
+        the document ID cache: its TTL and size cap would expire or evict entries before the loop
+        reaches them. Batching keeps each lookup close to its use for long pool lists.
 
-                if not last_docs:
-                    logger.debug(f"No last document found for pool {pool_id}")
-                    return first_id, None
+        Args:
+            pool_ids: Pool IDs to look up
+            batch_size: Number of pools looked up per batch
 
-                last_doc = last_docs[0]
-                last_id = last_doc.id
+        Yields:
+            (pool_id, (first document ID, last document ID)) in the order of pool_ids
+        """
+        for start in range(0, len(pool_ids), batch_size):
+            batch = pool_ids[start : start + batch_size]
+            doc_ids = self.get_first_and_last_document_ids(batch)
+            for pool_id in batch:
+                yield pool_id, doc_ids.get(pool_id, (None, None))
 
-                # Try to get timestamp values to improve the estimate
-                first_timestamp = None
-                last_timestamp = None
+    def invalidate_doc_id_cache(self, pool_id: Optional[str] = None) -> None:
+        """
+        Drop cached first/last document IDs.
 
-                try:
-                    if "timestamp" in first_doc.to_dict():
-                        first_timestamp = first_doc.to_dict()["timestamp"]
-                    if "timestamp" in last_doc.to_dict():
-                        last_timestamp = last_doc.to_dict()["timestamp"]
-
-                    # Log timestamp differences for debugging
-                    if first_timestamp and last_timestamp:
-                        time_diff = last_timestamp - first_timestamp
-                        logger.debug(
-                            f"Pool {pool_id} timeline: {first_timestamp} - {last_timestamp}, difference {time_diff}"
-                        )
-                except Exception as e:
-                    logger.debug(f"Failed to retrieve timestamp values: {e}")
+        Args:
+            pool_id: Pool whose entry to drop; None clears the whole cache
+        """
+        with self._doc_id_cache_lock:
+            if pool_id is None:
+                self._doc_id_cache.clear()
+            else:
+                self._doc_id_cache.pop(pool_id, None)
 
-                logger.debug(f"Documents found for pool {pool_id} between {first_id} - {last_id}")
-                return first_id, last_id
+    def get_first_document_id(self, pool_id: str) -> Optional[str]:
+        """
+        Fetches only the first (oldest) market context document ID for a pool.
 
-            # Continue with the original path marketContext/{pool_id}/marketContexts
-            # Get the first document in chronological order (oldest first)
-            # Use the timestamp field as it's likely already indexed
-            first_doc_query = contexts_ref.order_by("timestamp").limit(1)
-            first_docs = list(first_doc_query.stream())
+        Args:
+            pool_id: Pool ID
 
-            if not first_docs:
-                logger.debug(f"No first document found for pool {pool_id}")
-                return None, None
+        Returns:
+            First document ID or None if no documents are found
+        """
+        return self._get_boundary_document_id(pool_id, "first")
 
-            first_doc = first_docs[0]
-            first_id = first_doc.id
+    def get_last_document_id(self, pool_id: str) -> Optional[str]:
+        """
+        Fetches only the last (newest) market context document ID for a pool.
 
-            # Get the last document (newest)
-            try:
-                # First try the google.cloud.firestore library method
-                from google.cloud.firestore_v1 import Query
+        Args:
+            pool_id: Pool ID
 
-                last_doc_query = contexts_ref.order_by("timestamp", direction=Query.DESCENDING).limit(1)
-            except (ImportError, AttributeError):
-                # If it's not available, use the string directly
-                last_doc_query = contexts_ref.order_by("timestamp", direction="DESCENDING").limit(1)
+        Returns:
+            Last document ID or None if no documents are found
+        """
+        return self._get_boundary_document_id(pool_id, "last")
 
-            last_docs = list(last_doc_query.stream())
+    def _get_boundary_document_id(self, pool_id: str, boundary: str) -> Optional[str]:
+        """
+        Fetch one end of a pool's document range, querying only that end on a cache miss.
 
-            if not last_docs:
-                logger.debug(f"No last document found for pool {pool_id}")
-                return first_id, None
+        Args:
+            pool_id: Pool ID
+            boundary: "first" or "last"
 
-            last_doc = last_docs[0]
-            last_id = last_doc.id
+        Returns:
+            Document ID or None if no documents are found
+        """
+        if not self.db:
+            logger.error("Firebase not initialized, cannot get document IDs")
+            return None
 
-            # Try to get timestamp values to improve the estimate
-            first_timestamp = None
-            last_timestamp = None
+        cached = self._doc_id_cache.get(pool_id)
+        if cached and time.monotonic() - cached[0] < self._doc_id_cache_ttl:
+            return cached[1][DOCUMENT_BOUNDARIES.index(boundary)]
 
-            try:
-                if "timestamp" in first_doc.to_dict():
-                    first_timestamp = first_doc.to_dict()["timestamp"]
-                if "timestamp" in last_doc.to_dict():
-                    last_timestamp = last_doc.to_dict()["timestamp"]
-
-                # Log timestamp differences for debugging
-                if first_timestamp and last_timestamp:
-                    time_diff = last_timestamp - first_timestamp
-                    logger.debug(
-                        f"Pool {pool_id} timeline: {first_timestamp} - {last_timestamp}, difference {time_diff}"
-                    )
-            except Exception as e:
-                logger.debug(f"Failed to retrieve timestamp values: {e}")
+        try:
+            return self._lookup_document_ids(pool_id, (boundary,))[0]
+        except Exception as e:
+            logger.error(f"Error retrieving {boundary} document ID for pool {pool_id}: {e}")
+            return None
 
-            logger.debug(f"Documents found for pool {pool_id} between {first_id} - {last_id}")
-            return first_id, last_id
+    def _lookup_first_and_last_document_id(self, pool_id: str) -> tuple:
+        """
+        Query Firestore for the first and last market context document IDs of a pool.
 
-        except Exception as e:
-            logger.error(f"Error retrieving document IDs for pool {pool_id}: {e}")
-            return None, None
+        Args:
+            pool_id: Pool ID
+
+        Returns:
+            tuple: (first document ID, last document ID) or (None, None) if no documents are found
+        """
+        return tuple(self._lookup_document_ids(pool_id, DOCUMENT_BOUNDARIES))
+
+    def _lookup_document_ids(self, pool_id: str, boundaries: tuple) -> list:
+        """
+        Query Firestore for the requested ends of a pool's market context document range.
+
+        Args:
+            pool_id: Pool ID
+            boundaries: Subset of DOCUMENT_BOUNDARIES to look up
+
+        Returns:
+            list: Document ID (or None) for each requested boundary
+        """
+        # A poolIndex/{pool_id} summary document answers with one read, but costs an extra read per
+        # pool where the ingest side does not maintain it, so it is only consulted when enabled
+        if self.use_pool_index:
+            index_snapshot = (
+                self.db.collection("poolIndex")
+                .document(pool_id)
+                .get(field_paths=["first_doc_id", "last_doc_id"], retry=ID_LOOKUP_RETRY, timeout=ID_LOOKUP_TIMEOUT)
+            )
+            if index_snapshot.exists:
+                index_data = index_snapshot.to_dict() or {}
+                if index_data.get("first_doc_id"):
+                    return [index_data.get(f"{boundary}_doc_id") for boundary in boundaries]
+
+        # Try the layout this pool (or, failing that, the deployment) is known to use first.
+        # The boundary queries double as the existence probe, so no separate probe is needed.
+        layout = self._pool_layout.get(pool_id) or self._default_layout
+        layouts = [layout] + [name for name in POOL_LAYOUTS if name != layout] if layout else POOL_LAYOUTS
+        if self._pool_field_index_missing:
+            layouts = [name for name in layouts if name != "pool_field"]
+        lookups = {
+            "subcol": self._lookup_subcollection_documents,
+            "pool_field": self._lookup_pool_field_documents,
+            "flat": self._lookup_flat_documents,
+        }
+
+        for candidate in layouts:
+            results = lookups[candidate](pool_id, boundaries)
+
+            if not results[0]:
+                logger.debug("No documents found for pool %s in the %s layout", pool_id, candidate)
+                continue
+
+            self._remember_pool_layout(pool_id, candidate)
+
+            doc_ids = [docs[0].id if docs else None for docs in results]
+            if None in doc_ids:
+                logger.debug("No %s document found for pool %s", boundaries[doc_ids.index(None)], pool_id)
+            elif len(doc_ids) == 2 and logger.isEnabledFor(logging.DEBUG):
+                self._log_document_timeline(pool_id, doc_ids[0], doc_ids[1])
+            return doc_ids
+
+        return [None] * len(boundaries)
+
+    def _contexts_ref(self, pool_id: str):
+        """
+        Return the (memoized) marketContext/{pool_id}/marketContexts collection reference.
+
+        Args:
+            pool_id: Pool ID
+
+        Returns:
+            Firestore CollectionReference
+        """
+        contexts_ref = self._contexts_refs.get(pool_id)
+        if contexts_ref is None:
+            contexts_ref = self.db.collection("marketContext").document(pool_id).collection("marketContexts")
+            with self._contexts_refs_lock:
+                self._contexts_refs[pool_id] = contexts_ref
+                while len(self._contexts_refs) > DOC_ID_CACHE_MAX_ENTRIES:
+                    del self._contexts_refs[next(iter(self._contexts_refs))]
+        return contexts_ref
+
+    def _lookup_subcollection_documents(self, pool_id: str, boundaries: tuple = DOCUMENT_BOUNDARIES) -> list:
+        """
+        Find the oldest and/or newest documents in marketContext/{pool_id}/marketContexts.
+
+        Args:
+            pool_id: Pool ID
+            boundaries: Subset of DOCUMENT_BOUNDARIES to look up
+
+        Returns:
+            list: Query results for each requested boundary
+        """
+        contexts_ref = self._contexts_ref(pool_id)
+
+        # Use the timestamp field as it's likely already indexed. select([]) returns bare
+        # references, so no field data is transferred.
+        queries = {
+            "first": contexts_ref.select([]).order_by("timestamp").limit(1),
+            "last": contexts_ref.select([]).order_by("timestamp", direction=Query.DESCENDING).limit(1),
+        }
+
+        return self._get_id_lookups([queries[boundary] for boundary in boundaries])
+
+    def _lookup_pool_field_documents(self, pool_id: str, boundaries: tuple = DOCUMENT_BOUNDARIES) -> list:
+        """
+        Find the oldest and/or newest marketContext documents that store the pool in a poolId field.
+
+        Needs the composite indexes on (poolId ASC, timestamp ASC) and (poolId ASC, timestamp DESC)
+        defined in firestore.indexes.json; without them the layout is treated as empty and is no
+        longer tried for other pools.
+
+        Args:
+            pool_id: Pool ID
+            boundaries: Subset of DOCUMENT_BOUNDARIES to look up
+
+        Returns:
+            list: Query results for each requested boundary
+        """
+        pool_query = self.db.collection("marketContext").select([]).where("poolId", "==", pool_id)
+        queries = {
+            "first": pool_query.order_by("timestamp").limit(1),
+            "last": pool_query.order_by("timestamp", direction=Query.DESCENDING).limit(1),
+        }
+
+        try:
+            return self._get_id_lookups([queries[boundary] for boundary in boundaries])
+        except FailedPrecondition as e:
+            if not self._pool_field_index_missing:
+                logger.warning(f"poolId index not available, skipping the poolId layout from now on: {e}")
+                self._pool_field_index_missing = True
+            return [[] for _ in boundaries]
+
+    def _lookup_flat_documents(self, pool_id: str, boundaries: tuple = DOCUMENT_BOUNDARIES) -> list:
+        """
+        Find the oldest and/or newest {pool_id}_timestamp documents directly in the marketContext collection.
+
+        Args:
+            pool_id: Pool ID
+            boundaries: Subset of DOCUMENT_BOUNDARIES to look up
+
+        Returns:
+            list: Query results for each requested boundary
+        """
+        contexts_ref = self.db.collection("marketContext")
+
+        # Cursors on the document ID order use the built-in __name__ index with a single seek
+        # instead of a double range filter.
+        prefix = f"{pool_id}_"
+        prefix_end = prefix + "\uf8ff"
+        queries = {
+            "first": (
+                contexts_ref.select([])
+                .order_by(FieldPath.document_id())
+                .start_at([prefix])
+                .end_at([prefix_end])
+                .limit(1)
+            ),
+            "last": (
+                contexts_ref.select([])
+                .order_by(FieldPath.document_id(), direction=Query.DESCENDING)
+                .start_at([prefix_end])
+                .end_at([prefix])
+                .limit(1)
+            ),
+        }
+
+        return self._get_id_lookups([queries[boundary] for boundary in boundaries])
+
+    def _remember_pool_layout(self, pool_id: str, layout: str) -> None:
+        """
+        Record which storage layout a pool uses and promote it to the default while all pools agree.
+
+        Args:
+            pool_id: Pool ID
+            layout: One of POOL_LAYOUTS
+        """
+        with self._pool_layout_lock:
+            previous = self._pool_layout.get(pool_id)
+            if previous != layout:
+                if previous is not None:
+                    self._pool_layout_counts[previous] -= 1
+                self._pool_layout_counts[layout] += 1
+                self._pool_layout[pool_id] = layout
+
+            # All known pools share this layout exactly when its count covers every pool
+            all_agree = self._pool_layout_counts[layout] == len(self._pool_layout)
+            self._default_layout = layout if all_agree else None
+
+    @staticmethod
+    def _log_document_timeline(pool_id: str, first_id: str, last_id: str) -> None:
+        """
+        Log the document ID range of a pool, with the timeline parsed from IDs of the form {prefix}_{timestamp}.
+
+        Args:
+            pool_id: Pool ID
+            first_id: First document ID
+            last_id: Last document ID
+        """
+        logger.debug(f"Documents found for pool {pool_id} between {first_id} - {last_id}")
+
+        first_part = first_id.rsplit("_", 1)[-1]
+        last_part = last_id.rsplit("_", 1)[-1]
+        if first_part.isdigit() and last_part.isdigit():
+            first_timestamp = int(first_part)
+            last_timestamp = int(last_part)
+            logger.debug(
+                f"Pool {pool_id} timeline: {first_timestamp} - {last_timestamp}, "
+                f"difference {last_timestamp - first_timestamp}"
+            )
+
+    @staticmethod
+    def _get_id_lookup(query) -> list:
+        """
+        Run a document ID lookup query with a short retry deadline.
+
+        Args:
+            query: Firestore query selecting document references
+
+        Returns:
+            List of document snapshots
+        """
+        return query.get(retry=ID_LOOKUP_RETRY, timeout=ID_LOOKUP_TIMEOUT)
+
+    def _get_id_lookups(self, queries: list) -> list:
+        """
+        Run document ID lookups, in parallel when there are several as they are independent round trips.
+
+        Args:
+            queries: Queries selecting document references
+
+        Returns:
+            list: Results of each query, in order
+        """
+        if len(queries) == 1:
+            return [self._get_id_lookup(queries[0])]
+
+        return list(self._id_lookup_executor.map(self._get_id_lookup, queries))
 
     def flatten_nested_fields(self, data: dict, parent_key: str = "", sep: str = "_") -> dict:
         """
@@ -6,9 +6,15 @@ This module provides the main class for running backtesting simulations
 with Solana trading data. It orchestrates the buy and sell simulation processes.
 """
 
+import heapq
 import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice, repeat
+
+import numpy as np
 import pandas as pd
-from typing import Dict, Optional, List
+from typing import Callable, Dict, Optional, List
 
 from src.data.firebase_service import FirebaseService
 from src.simulation.buy_simulator import BuySimulator
@@ -29,22 +35,79 @@ def preprocess_pool_data(df: pd.DataFrame) -> pd.DataFrame:
     Returns:
         Preprocessed DataFrame
     """
-    # Create a copy to avoid modifying the original
-    df = df.copy()
-
-    # Ensure timestamp is in datetime format
     if "timestamp" in df.columns:
-        df["timestamp"] = pd.to_datetime(df["timestamp"])
+        # run_simulation parses and sorts the whole frame once; only unprocessed input is converted here
+        if not pd.api.types.is_datetime64_any_dtype(df["timestamp"]):
+            df = df.assign(timestamp=pd.to_datetime(df["timestamp"]))
 
-    # Sort by timestamp
-    df = df.sort_values("timestamp")
+        # Sort by timestamp
+        if not df["timestamp"].is_monotonic_increasing:
+            df = df.sort_values("timestamp")
 
-    # Reset index
-    df = df.reset_index(drop=True)
+    # Reset index (returns a new frame, so the original is not modified); frames that already
+    # have the default index are returned as they are
+    if not df.index.equals(pd.RangeIndex(len(df))):
+        df = df.reset_index(drop=True)
 
     return df
 
 
+def _simulate_pool_buy(buy_simulator: BuySimulator, pool_df: pd.DataFrame) -> Optional[Dict]:
+    """
+    Preprocess one pool and look for a buy opportunity in it.
+
+    Defined at module level so that it can be sent to worker processes.
+
+    Args:
+        buy_simulator: Configured buy simulator
+        pool_df: DataFrame containing data for a single pool
+
+    Returns:
+        Buy opportunity dictionary if found, None otherwise
+    """
+    return buy_simulator.find_buy_opportunity(preprocess_pool_data(pool_df))
+
+
+def _simulate_trade_sell(sell_simulator: SellSimulator, buy_opportunity: Dict) -> Optional[Dict]:
+    """
+    Run the sell simulation for one buy opportunity.
+
+    Args:
+        sell_simulator: Configured sell simulator
+        buy_opportunity: Buy opportunity found by the buy simulator
+
+    Returns:
+        Trade result dictionary, or None if the simulation failed
+    """
+    return sell_simulator.simulate_sell(buy_opportunity)
+
+
+def _map_in_processes(func: Callable, simulator, items: List, max_workers: int) -> List:
+    """
+    Apply func(simulator, item) to every item, spreading the work over worker processes.
+
+    Results are returned in the order of items. Small inputs and max_workers=1 run in this process.
+    Workers are spawned rather than forked, because the gRPC channel of the Firestore client and the
+    fetch thread pools already exist in this process and are not fork-safe.
+
+    Args:
+        func: Module-level function taking the simulator and one item
+        simulator: Simulator instance passed to every call
+        items: Items to process
+        max_workers: Number of worker processes
+
+    Returns:
+        List of results
+    """
+    workers = min(max_workers, len(items))
+    if workers <= 1:
+        return [func(simulator, item) for item in items]
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        chunksize = max(1, len(items) // (workers * 4))
+        return list(executor.map(func, repeat(simulator), items, chunksize=chunksize))
+
+
 class BacktestRunner:
     """
     Runs backtesting simulations using data directly from Firebase without saving local files.
@@ -97,6 +160,7 @@ class BacktestRunner:
         stoploss_params: Optional[Dict] = None,
         momentum_params: Optional[Dict] = None,
         max_pools: Optional[int] = None,
+        max_workers: int = 1,
     ):
         """
         Run the full simulation process
@@ -107,21 +171,42 @@ class BacktestRunner:
             stoploss_params: Parameters for stoploss strategy
             momentum_params: Parameters for momentum strategy
             max_pools: Maximum number of pools to analyze (for testing)
+            max_workers: Number of worker processes for the per-pool simulations; the default of 1 runs
+                everything in this process. Pools are pickled to the workers, which only pays off for many pools.
         """
         try:
             # Fetch data from Firebase
             logger.info("Starting data fetch from Firebase...")
-            df = self.firebase_service.fetch_market_data()
+            market_data = self.firebase_service.fetch_market_data()
+
+            # fetch_market_data returns one DataFrame per pool; combine them into a single frame
+            if isinstance(market_data, dict):
+                market_data = pd.concat(market_data.values(), ignore_index=True) if market_data else None
 
             # Preprocess data
-            df = preprocess_market_data(df)
+            df = preprocess_market_data(market_data)
+            if df is None:
+                logger.warning("No market data available for simulation")
+                return
+
+            # Parse timestamps once for the whole frame and drop rows where parsing fails
+            if not pd.api.types.is_datetime64_any_dtype(df["timestamp"]):
+                df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce")
+                df.dropna(subset=["timestamp"], inplace=True)
+
+            # Categorical pool addresses let the sort and groupby compare integer codes instead of strings
+            df["poolAddress"] = df["poolAddress"].astype("category")
 
-            # Get unique pools
-            unique_pools = df["poolAddress"].unique()
-            logger.info(f"Found {len(unique_pools)} unique pools")
+            # Sort once so that every pool group below is already in timestamp order
+            df.sort_values(["poolAddress", "timestamp"], kind="stable", inplace=True, ignore_index=True)
 
+            # Partition the frame by pool in a single pass instead of masking it once per pool
+            pool_groups = df.groupby("poolAddress", sort=False, observed=True)
+            logger.info(f"Found {pool_groups.ngroups} unique pools")
+
+            pool_iter = iter(pool_groups)
             if max_pools:
-                unique_pools = unique_pools[:max_pools]
+                pool_iter = islice(pool_iter, max_pools)
                 logger.info(f"Limited to {max_pools} pools for testing")
 
             # Initialize simulators
@@ -138,22 +223,21 @@ class BacktestRunner:
                 **({} if sell_params is None else sell_params),
             )
 
-            # Run buy simulation
-            logger.info("Running buy simulation...")
-            for pool_addr in unique_pools:
-                pool_df = df[df["poolAddress"] == pool_addr].copy()
-
+            # Collect pools with enough data for the buy simulation
+            pool_addresses, pool_frames = [], []
+            for pool_addr, pool_df in pool_iter:
                 # Skip pools with insufficient data
                 if len(pool_df) < self.max_delay + 10:
                     logger.debug(f"Skipping pool {pool_addr}: insufficient data")
                     continue
+                pool_addresses.append(pool_addr)
+                pool_frames.append(pool_df)
 
-                # Preprocess pool data
-                pool_df = preprocess_pool_data(pool_df)
-
-                # Run buy simulation for this pool
-                buy_opportunity = buy_simulator.find_buy_opportunity(pool_df)
+            # Run buy simulation; pools are independent, so they are simulated in parallel
+            logger.info("Running buy simulation...")
+            buy_results = _map_in_processes(_simulate_pool_buy, buy_simulator, pool_frames, max_workers)
 
+            for pool_addr, buy_opportunity in zip(pool_addresses, buy_results):
                 if buy_opportunity:
                     self.buy_opportunities.append(buy_opportunity)
                     logger.info(f"Found buy opportunity for pool {pool_addr}")
@@ -163,10 +247,10 @@ class BacktestRunner:
             # Run sell simulation
             if self.buy_opportunities:
                 logger.info("Running sell simulation...")
-                for buy_opportunity in self.buy_opportunities:
-                    sell_result = sell_simulator.simulate_sell(buy_opportunity)
-                    if sell_result:
-                        self.trade_results.append(sell_result)
+                sell_results = _map_in_processes(
+                    _simulate_trade_sell, sell_simulator, self.buy_opportunities, max_workers
+                )
+                self.trade_results.extend(result for result in sell_results if result)
 
                 logger.info(f"Sell simulation complete. Processed {len(self.trade_results)} trades.")
 
@@ -183,15 +267,19 @@ class BacktestRunner:
     def _calculate_statistics(self):
         """Calculate and display summary statistics for the trades"""
         try:
-            profits = [result["profit_ratio"] for result in self.trade_results]
+            profits = np.fromiter(
+                (result["profit_ratio"] for result in self.trade_results),
+                dtype=np.float64,
+                count=len(self.trade_results),
+            )
 
             total_trades = len(profits)
-            winning_trades = sum(1 for p in profits if p > 1.0)
+            winning_trades = int((profits > 1.0).sum())
             losing_trades = total_trades - winning_trades
 
             win_rate = (winning_trades / total_trades) * 100 if total_trades > 0 else 0
 
-            avg_profit = sum([(p - 1.0) * 100 for p in profits]) / total_trades if total_trades > 0 else 0
+            avg_profit = float((profits - 1.0).mean() * 100) if total_trades > 0 else 0
 
             logger.info("\n=== SIMULATION RESULTS ===")
             logger.info(f"Total trades: {total_trades}")
@@ -201,10 +289,11 @@ class BacktestRunner:
 
             # Print top 5 most profitable trades
             if self.trade_results:
-                sorted_results = sorted(self.trade_results, key=lambda x: x["profit_ratio"], reverse=True)
+                # nlargest keeps the five best without sorting every trade; ties stay in first-seen order
+                top_trades = heapq.nlargest(5, self.trade_results, key=lambda x: x["profit_ratio"])
 
                 logger.info("\nTop 5 profitable trades:")
-                for i, trade in enumerate(sorted_results[:5], 1):
+                for i, trade in enumerate(top_trades, 1):
                     profit_pct = (trade["profit_ratio"] - 1.0) * 100
                     logger.info(
                         f"{i}. Pool: {trade['pool_address']} - "
@@ -5,6 +5,7 @@ This module provides a simulator for finding optimal buy entry points
 in Solana trading pools based on various market metrics.
 """
 
+import numpy as np
 import pandas as pd
 import logging
 from typing import Dict, Optional
@@ -14,6 +15,18 @@ from datetime import datetime
 logger = logging.getLogger("BuySimulator")
 
 
+# Per-row metrics read by find_buy_opportunity: metric name -> (data column, default when the column is missing)
+ROW_METRIC_COLUMNS = {
+    "mc_change_5s": ("marketCapChange5s", 0),
+    "mc_change_30s": ("marketCapChange30s", 0),
+    "holder_delta_30s": ("holderDelta30s", 0),
+    "buy_volume_5s": ("buyVolume5s", 0),
+    "net_volume_5s": ("netVolume5s", 0),
+    "buy_sell_ratio_10s": ("buySellRatio10s", 1.0),
+    "large_buy_5s": ("largeBuys5s", 0),
+}
+
+
 def get_default_parameters() -> Dict[str, float]:
     """
     Get default parameters for buy strategy.
@@ -40,6 +53,11 @@ class BuySimulator:
     Simulator for finding optimal buy entry points in Solana token pools.
     """
 
+    # Pre-filter the buy window with vectorized threshold masks before confirming rows with
+    # check_buy_conditions. Subclasses whose conditions can accept rows that fail a threshold must
+    # set this to False so that every row of the window is checked.
+    vectorized_conditions = True
+
     def __init__(
         self,
         early_mc_limit: float = 400000,  # Market cap limit for early filtering
@@ -85,17 +103,21 @@ class BuySimulator:
             Boolean indicating whether buying conditions are met
         """
         try:
-            logger.debug(f"Checking buy conditions with: {metrics}")
-            logger.debug(f"Initial metrics: {initial_metrics}")
+            # Called for every scanned row in the per-row fallback; only format debug output when it is shown
+            debug_enabled = logger.isEnabledFor(logging.DEBUG)
+            if debug_enabled:
+                logger.debug("Checking buy conditions with: %s", metrics)
+                logger.debug("Initial metrics: %s", initial_metrics)
 
             # Track metrics that passed checks
+            passed_count = 0
             passed_metrics = []
 
             # Check each metric against its threshold
             for metric_name, threshold in self.buy_params.items():
                 # Skip price_change check if not available (special case)
                 if metric_name == "price_change" and "price_change" not in metrics:
-                    logger.debug(f"Skipping {metric_name} check - not in metrics")
+                    logger.debug("Skipping %s check - not in metrics", metric_name)
                     continue
 
                 # Choose where to look for the metric
@@ -144,14 +166,17 @@ class BuySimulator:
 
                 # Check if the metric meets the threshold
                 if actual_value < threshold:
-                    logger.debug(f"Failed check: {metric_name} = {actual_value} < {threshold}")
+                    logger.debug("Failed check: %s = %s < %s", metric_name, actual_value, threshold)
                     return False
 
-                passed_metrics.append(f"{metric_name}={actual_value:.2f}")
+                passed_count += 1
+                if debug_enabled:
+                    passed_metrics.append(f"{metric_name}={actual_value:.2f}")
 
             # All checks passed (or skipped)
-            if passed_metrics:
-                logger.debug(f"All checks passed: {', '.join(passed_metrics)}")
+            if passed_count:
+                if debug_enabled:
+                    logger.debug("All checks passed: %s", ", ".join(passed_metrics))
                 return True
             else:
                 logger.warning("No metrics were checked - all were missing")
@@ -161,6 +186,60 @@ class BuySimulator:
             logger.error(f"Error in check_buy_conditions: {str(e)}")
             return False
 
+    def _candidate_rows(
+        self,
+        metric_arrays: Dict,
+        market_caps: Optional[np.ndarray],
+        holders: Optional[np.ndarray],
+        window_start: int,
+        window_end: int,
+    ) -> np.ndarray:
+        """
+        Find the rows of the buy window whose metrics meet every threshold, using vectorized comparisons.
+
+        Mirrors check_buy_conditions: thresholds of metrics that are not available are skipped and a
+        missing (NaN) value does not fail a check. If the thresholds cannot be evaluated as arrays, or
+        vectorized_conditions is False, every row of the window is returned for a per-row check.
+
+        Args:
+            metric_arrays: Metric name -> (column values or None, default) as built by find_buy_opportunity
+            market_caps: Market cap values, or None if the column is missing
+            holders: Holder counts, or None if the column is missing
+            window_start: First row of the buy window
+            window_end: End (exclusive) of the buy window
+
+        Returns:
+            Array of candidate row numbers in ascending order
+        """
+        rows = np.arange(window_start, window_end)
+        if not self.vectorized_conditions:
+            return rows
+
+        window = slice(window_start, window_end)
+        available = {
+            metric_name: values[window] if values is not None else default
+            for metric_name, (values, default) in metric_arrays.items()
+        }
+        available["mc_growth_from_start"] = (
+            (market_caps[window] / market_caps[0] - 1) * 100 if market_caps is not None and market_caps[0] > 0 else 0
+        )
+        available["holder_growth_from_start"] = holders[window] - holders[0] if holders is not None else 0
+
+        mask = np.ones(len(rows), dtype=bool)
+        checked = False
+        try:
+            for metric_name, threshold in self.buy_params.items():
+                if metric_name not in available:
+                    continue
+                mask &= ~np.asarray(available[metric_name] < threshold, dtype=bool)
+                checked = True
+        except TypeError:
+            # Non-numeric values; let check_buy_conditions handle them row by row
+            return rows
+
+        # Without any available metric check_buy_conditions rejects every row
+        return rows[mask] if checked else rows[:0]
+
     def find_buy_opportunity(self, pool_data: pd.DataFrame) -> Optional[Dict]:
         """
         Find a buy opportunity in the given pool data.
@@ -177,7 +256,8 @@ class BuySimulator:
                 return None
 
             # Make sure data is sorted by timestamp
-            pool_data = pool_data.sort_values("timestamp")
+            if not pool_data["timestamp"].is_monotonic_increasing:
+                pool_data = pool_data.sort_values("timestamp")
 
             # Get pool address - handle both column name formats
             if "poolAddress" in pool_data.columns:
@@ -224,42 +304,42 @@ class BuySimulator:
 
             logger.info(f"Scanning for buy opportunities between rows {window_start} and {window_end}")
 
-            # Scan through the window for buy opportunities
-            for i in range(window_start, window_end):
-                current_row = pool_data.iloc[i]
+            # Read the scanned columns into NumPy arrays once instead of building a row Series per step
+            metric_arrays = {
+                metric_name: (pool_data[column].to_numpy() if column in pool_data.columns else None, default)
+                for metric_name, (column, default) in ROW_METRIC_COLUMNS.items()
+            }
+            market_caps = pool_data["marketCap"].to_numpy() if "marketCap" in pool_data.columns else None
+            holders = pool_data["holders"].to_numpy() if "holders" in pool_data.columns else None
+
+            # Evaluate the thresholds for the whole window at once and confirm only the matching rows
+            candidate_rows = self._candidate_rows(metric_arrays, market_caps, holders, window_start, window_end)
 
+            # Scan through the window for buy opportunities
+            for i in map(int, candidate_rows):
                 # Get current price metrics
                 current_metrics = {
-                    "mc_change_5s": current_row.get("marketCapChange5s", 0),
-                    "mc_change_30s": current_row.get("marketCapChange30s", 0),
-                    "holder_delta_30s": current_row.get("holderDelta30s", 0),
-                    "buy_volume_5s": current_row.get("buyVolume5s", 0),
-                    "net_volume_5s": current_row.get("netVolume5s", 0),
-                    "buy_sell_ratio_10s": current_row.get("buySellRatio10s", 1.0),
-                    "large_buy_5s": current_row.get("largeBuys5s", 0),
+                    metric_name: values[i] if values is not None else default
+                    for metric_name, (values, default) in metric_arrays.items()
                 }
 
                 # Get metrics from the beginning of data for growth checks
-                initial_row = pool_data.iloc[0]
                 initial_metrics = {
                     "mc_growth_from_start": (
-                        (current_row["marketCap"] / initial_row["marketCap"] - 1) * 100
-                        if "marketCap" in initial_row and initial_row["marketCap"] > 0
+                        (market_caps[i] / market_caps[0] - 1) * 100
+                        if market_caps is not None and market_caps[0] > 0
                         else 0
                     ),
-                    "holder_growth_from_start": (
-                        current_row["holders"] - initial_row["holders"] if "holders" in initial_row else 0
-                    ),
+                    "holder_growth_from_start": holders[i] - holders[0] if holders is not None else 0,
                 }
 
                 # Check if this point meets buy criteria
                 if self.check_buy_conditions(current_metrics, initial_metrics, pool_data.iloc[: i + 1]):
                     # Calculate the entry price (market cap)
-                    entry_price = current_row["marketCap"]
+                    entry_price = market_caps[i]
+                    entry_timestamp = pool_data["timestamp"].iloc[i]
                     entry_time = (
-                        current_row["timestamp"].isoformat()
-                        if isinstance(current_row["timestamp"], datetime)
-                        else str(current_row["timestamp"])
+                        entry_timestamp.isoformat() if isinstance(entry_timestamp, datetime) else str(entry_timestamp)
                     )
 
                     # Create the buy opportunity record
@@ -267,6 +347,8 @@ class BuySimulator:
                         address_column: pool_address,  # Use the correct column name
                         "entry_price": entry_price,
                         "entry_time": entry_time,
+                        # Native timestamp alongside the string so calculate_returns does not re-parse it
+                        "entry_time_ts": entry_timestamp if isinstance(entry_timestamp, datetime) else None,
                         "entry_row": i,
                         "entry_metrics": {**current_metrics, **initial_metrics},
                         "post_entry_data": pool_data.iloc[i:].reset_index(drop=True),
@@ -303,16 +385,20 @@ def calculate_returns(buy_opportunity: Dict) -> Dict:
         if post_entry_data.empty:
             return buy_opportunity
 
-        # Calculate maximum potential return
-        max_price = post_entry_data["marketCap"].max()
+        # Calculate maximum potential return; one pass finds both the peak and its position
+        market_caps = post_entry_data["marketCap"].to_numpy(dtype=np.float64)
+        max_pos = int(np.nanargmax(market_caps))
+        max_price = market_caps[max_pos]
         max_return = max_price / entry_price
 
         # Calculate more realistic returns (e.g., exit at 80% of max)
         realistic_return = max_return * 0.8
 
-        # Find time to reach maximum price
-        max_idx = post_entry_data["marketCap"].idxmax()
-        time_to_max = post_entry_data.loc[max_idx, "timestamp"] - pd.to_datetime(buy_opportunity["entry_time"])
+        # Find time to reach maximum price; parse entry_time only when no native timestamp was stored
+        entry_time = buy_opportunity.get("entry_time_ts")
+        if entry_time is None:
+            entry_time = pd.to_datetime(buy_opportunity["entry_time"])
+        time_to_max = post_entry_data["timestamp"].iloc[max_pos] - entry_time
 
         # Add metrics to buy opportunity
         buy_opportunity["max_price"] = max_price
@@ -13,6 +13,18 @@ from typing import Dict, Optional, List
 logger = logging.getLogger("SellSimulator")
 
 
+# Per-row metrics read by simulate_sell: metric name -> data column (missing columns read as 0)
+SELL_METRIC_COLUMNS = {
+    "mc_change_5s": "marketCapChange5s",
+    "holder_change_5s": "holderDelta5s",
+    "holder_change_30s": "holderDelta30s",
+    "holder_change_60s": "holderDelta60s",
+    "buy_volume_5s": "buyVolume5s",
+    "net_volume_5s": "netVolume5s",
+    "price_change": "priceChangePercent",
+}
+
+
 def get_default_stoploss_params() -> Dict[str, float]:
     """
     Get default stoploss parameters for sell strategy.
@@ -182,12 +194,18 @@ class SellSimulator:
             exit_reason = ""
             current_metrics = {}
 
+            # Read the columns used in the loop into NumPy arrays once instead of indexing a row per step
+            prices = pool_data["marketCap"].to_numpy()
+            metric_arrays = {
+                metric_name: pool_data[column].to_numpy() if column in pool_data.columns else None
+                for metric_name, column in SELL_METRIC_COLUMNS.items()
+            }
+
             # Track position through the data
             for index in range(len(pool_data)):
                 try:
-                    # Get current price and time
-                    current_price = pool_data.iloc[index]["marketCap"]
-                    current_time = pd.to_datetime(pool_data.iloc[index]["timestamp"])
+                    # Get current price
+                    current_price = prices[index]
                     profit_ratio = current_price / entry_price
 
                     # Update maximum price and profit
@@ -195,30 +213,10 @@ class SellSimulator:
                     max_profit = max(max_profit, profit_ratio)
 
                     # Collect current metrics
-                    try:
-                        current_metrics = {
-                            "mc_change_5s": pool_data.iloc[index].get("marketCapChange5s", 0),
-                            "holder_change_5s": pool_data.iloc[index].get("holderDelta5s", 0),
-                            "holder_change_30s": pool_data.iloc[index].get("holderDelta30s", 0),
-                            "holder_change_60s": pool_data.iloc[index].get("holderDelta60s", 0),
-                            "buy_volume_5s": pool_data.iloc[index].get("buyVolume5s", 0),
-                            "net_volume_5s": pool_data.iloc[index].get("netVolume5s", 0),
-                            "price_change": pool_data.iloc[index].get("priceChangePercent", 0),
-                        }
-                    except Exception as e:
-                        logger.warning(f"Error collecting metrics at index {index}: {str(e)}")
-                        # Set defaults for missing metrics
-                        for key in [
-                            "mc_change_5s",
-                            "holder_change_5s",
-                            "holder_change_30s",
-                            "holder_change_60s",
-                            "buy_volume_5s",
-                            "net_volume_5s",
-                            "price_change",
-                        ]:
-                            if key not in current_metrics:
-                                current_metrics[key] = 0
+                    current_metrics = {
+                        metric_name: values[index] if values is not None else 0
+                        for metric_name, values in metric_arrays.items()
+                    }
 
                     # Check sell conditions
                     # 1. Take profit condition
@@ -309,11 +307,16 @@ class SellSimulator:
             if not exit_reason:
                 exit_reason = "Force Sell"
                 index = len(pool_data) - 1
-                current_price = pool_data.iloc[index]["marketCap"]
-                current_time = pd.to_datetime(pool_data.iloc[index]["timestamp"])
+                current_price = prices[index]
                 profit_ratio = current_price / entry_price
                 logger.warning("No exit conditions met, forcing sell at end of data")
 
+            # Exit time is only needed for the row the position was closed on
+            current_time = pd.to_datetime(pool_data["timestamp"].iloc[index])
+            entry_timestamp = buy_opportunity.get("entry_time_ts")
+            if entry_timestamp is None:
+                entry_timestamp = pd.to_datetime(entry_time)
+
             # Calculate profit
             profit_sol = (profit_ratio - 1) * self.initial_investment
 
@@ -344,7 +347,7 @@ class SellSimulator:
                 "exit_reason": exit_reason,
                 "profit_ratio": profit_ratio,
                 "max_profit": max_profit,
-                "trade_duration": (current_time - pd.to_datetime(entry_time)).total_seconds(),
+                "trade_duration": (current_time - entry_timestamp).total_seconds(),
                 "investment_sol": self.initial_investment,
                 "profit_sol": profit_sol,
                 "entry_metrics": entry_metrics,
@@ -80,7 +80,22 @@ def get_pool_ids(db, limit=None):
         return []
 
 
-def fetch_market_data_for_pool(db, pool_id, limit=100, min_data_points=20):
+def to_epoch_ms(value):
+    """
+    Convert a datetime to the millisecond epoch integer that marketContexts timestamps are stored as.
+
+    Args:
+        value: datetime (naive values are treated as local time) or epoch milliseconds
+
+    Returns:
+        Milliseconds since the Unix epoch as an int
+    """
+    if isinstance(value, datetime):
+        return int(value.timestamp() * 1000)
+    return int(value)
+
+
+def fetch_market_data_for_pool(db, pool_id, limit=100, min_data_points=20, fields=None, since=None):
     """
     Fetch market data for a specific pool from the marketContexts subcollection.
 
@@ -89,6 +104,8 @@ def fetch_market_data_for_pool(db, pool_id, limit=100, min_data_points=20):
         pool_id: ID of the pool to fetch data for
         limit: Maximum number of data points to fetch (default: 100)
         min_data_points: Minimum number of data points required (default: 20)
+        fields: Optional list of document fields to fetch; other fields are not sent by Firestore
+        since: Optional datetime or epoch milliseconds; only documents with a timestamp at or after it are fetched
 
     Returns:
         Pandas DataFrame with the market data, or None if insufficient data
@@ -100,10 +117,18 @@ def fetch_market_data_for_pool(db, pool_id, limit=100, min_data_points=20):
         # Get the marketContexts subcollection
         contexts_collection = pool_doc.collection("marketContexts")
 
+        # Project only the requested fields server-side to cut transferred bytes
+        query = contexts_collection
+        if fields:
+            query = query.select(fields)
+
+        # Filter on the server so that older documents are never transferred. Firestore only compares
+        # values of the same type, so the cutoff must match the stored epoch-millisecond integers.
+        if since is not None:
+            query = query.where("timestamp", ">=", to_epoch_ms(since))
+
         # Order by timestamp and limit the number of documents
-        contexts = list(
-            contexts_collection.order_by("timestamp", direction=firestore.Query.DESCENDING).limit(limit).stream()
-        )
+        contexts = list(query.order_by("timestamp", direction=firestore.Query.DESCENDING).limit(limit).stream())
 
         if len(contexts) < min_data_points:
             logger.warning(f"Insufficient data points for pool {pool_id}: {len(contexts)} < {min_data_points}")
@@ -302,6 +327,10 @@ def preprocess_market_data(df):
     if df is None or df.empty:
         return None
 
+    # Skip frames that have already been preprocessed
+    if df.attrs.get("market_data_preprocessed"):
+        return df
+
     # Make a copy to avoid modifying the original
     result = df.copy()
 
@@ -329,4 +358,6 @@ def preprocess_market_data(df):
     numeric_cols = result.select_dtypes(include=["number"]).columns
     result[numeric_cols] = result[numeric_cols].fillna(0)
 
+    result.attrs["market_data_preprocessed"] = True
+
     return result
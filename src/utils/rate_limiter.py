@@ -0,0 +1,66 @@
+"""
+Rate Limiting Utilities
+
+This module provides a thread-safe token bucket used to keep concurrent Firestore
+requests under a queries-per-second ceiling without serial sleeps between calls.
+"""
+
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket rate limiter.
+
+    The bucket holds up to `capacity` tokens and is refilled at `refill_rate` tokens per second.
+    Each request takes one token; callers block in acquire() until a token is available.
+    """
+
+    def __init__(self, capacity: float, refill_rate: float):
+        """
+        Initialize the bucket full.
+
+        Args:
+            capacity: Maximum number of tokens (burst size)
+            refill_rate: Tokens added per second (sustained requests per second)
+        """
+        if capacity <= 0 or refill_rate <= 0:
+            raise ValueError("capacity and refill_rate must be positive")
+
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self._tokens = capacity
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        """Add the tokens accumulated since the last refill. Must be called with the lock held."""
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last_refill) * self.refill_rate)
+        self._last_refill = now
+
+    def try_acquire(self) -> bool:
+        """
+        Take a token if one is available without waiting.
+
+        Returns:
+            True if a token was taken
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+    def acquire(self) -> None:
+        """Take a token, blocking until one is available."""
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait_time = (1 - self._tokens) / self.refill_rate
+            time.sleep(wait_time)
@@ -7,7 +7,7 @@ import os
 # Add the src directory to the path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
 
-from src.data.data_processor import preprocess_pool_data, filter_pools
+from src.data.data_processor import preprocess_all_pools, preprocess_pool_data, filter_pools
 
 
 class TestDataProcessor(unittest.TestCase):
@@ -100,6 +100,39 @@ class TestDataProcessor(unittest.TestCase):
         self.assertGreater(processed_df["mcGrowthFromStart"].iloc[-1], 0)  # Should be positive
         self.assertGreater(processed_df["holderGrowthFromStart"].iloc[-1], 0)  # Should be positive
 
+    def test_preprocessed_pool_is_returned_unchanged(self):
+        """Test that a pool flagged as preprocessed is not processed again."""
+        processed_df = preprocess_pool_data(self.sample_df)
+        self.assertIs(preprocess_pool_data(processed_df), processed_df)
+
+    def test_raw_frame_with_derived_column_names_is_processed(self):
+        """Test that columns named like derived metrics do not mark a raw frame as preprocessed."""
+        raw_df = self.sample_pools["pool1"].copy()
+        raw_df["timestamp"] = pd.to_datetime(raw_df["timestamp"])
+        for column in ["marketCapChange5s", "marketCapChange30s", "marketCapChange60s", "mcGrowthFromStart"]:
+            raw_df[column] = -1.0
+        for column in ["holderDelta5s", "holderDelta30s", "holderDelta60s", "holderGrowthFromStart"]:
+            raw_df[column] = -1
+
+        processed_df = preprocess_pool_data(raw_df)
+
+        self.assertIn("poolAddress", processed_df.columns)
+        self.assertEqual(processed_df["holderDelta5s"].iloc[1], 1)
+
+    def test_preprocess_all_pools_matches_per_pool(self):
+        """Test that the whole-frame pass gives the same metrics as preprocessing each pool."""
+        combined_df = pd.concat([self.sample_pools["pool3"], self.sample_pools["pool1"]], ignore_index=True)
+        processed_df = preprocess_all_pools(combined_df)
+
+        for pool_id in ["pool1", "pool3"]:
+            expected = preprocess_pool_data(self.sample_pools[pool_id]).reset_index(drop=True)
+            actual = processed_df[processed_df["poolAddress"] == pool_id].reset_index(drop=True)
+            pd.testing.assert_frame_equal(actual[expected.columns], expected)
+
+        # Pools split from the enriched frame are not processed again
+        pool_df = filter_pools(processed_df, min_data_points=10)["pool1"]
+        self.assertIs(preprocess_pool_data(pool_df), pool_df)
+
     def test_filter_pools(self):
         """Test filtering pools based on data points."""
         # Filter pools with at least 10 data points
@@ -7,7 +7,10 @@ import pandas as pd
 # Add the src directory to the path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
 
+from google.api_core.exceptions import FailedPrecondition
+
 from src.data.firebase_service import FirebaseService
+from src.utils.firebase_utils import preprocess_market_data
 
 
 class TestFirebaseService(unittest.TestCase):
@@ -239,5 +242,240 @@ class TestFirebaseService(unittest.TestCase):
     # Add more tests for other methods as needed
 
 
+class TestDocumentIdCache(unittest.TestCase):
+    """Test caching of first/last document ID lookups."""
+
+    def setUp(self):
+        """Set up a service backed by a mock Firestore client."""
+        with patch("src.data.firebase_service._get_db", return_value=MagicMock()):
+            self.firebase_service = FirebaseService()
+
+    def test_repeat_lookup_is_served_from_cache(self):
+        """Test that a second lookup within the TTL does not query Firestore."""
+        with patch.object(
+            self.firebase_service, "_lookup_first_and_last_document_id", return_value=("first", "last")
+        ) as mock_lookup:
+            self.assertEqual(self.firebase_service.get_first_and_last_document_id("pool"), ("first", "last"))
+            self.assertEqual(self.firebase_service.get_first_and_last_document_id("pool"), ("first", "last"))
+            self.assertEqual(mock_lookup.call_count, 1)
+
+            self.firebase_service.invalidate_doc_id_cache("pool")
+            self.firebase_service.get_first_and_last_document_id("pool")
+            self.assertEqual(mock_lookup.call_count, 2)
+
+    def test_expired_entry_is_refreshed(self):
+        """Test that entries older than the TTL are looked up again."""
+        self.firebase_service._doc_id_cache_ttl = 0.0
+        with patch.object(
+            self.firebase_service, "_lookup_first_and_last_document_id", return_value=("first", "last")
+        ) as mock_lookup:
+            self.firebase_service.get_first_and_last_document_id("pool")
+            self.firebase_service.get_first_and_last_document_id("pool")
+            self.assertEqual(mock_lookup.call_count, 2)
+
+    def test_errors_are_not_cached(self):
+        """Test that a failed lookup is retried on the next call."""
+        with patch.object(
+            self.firebase_service,
+            "_lookup_first_and_last_document_id",
+            side_effect=[RuntimeError("unavailable"), ("first", "last")],
+        ):
+            self.assertEqual(self.firebase_service.get_first_and_last_document_id("pool"), (None, None))
+            self.assertEqual(self.firebase_service.get_first_and_last_document_id("pool"), ("first", "last"))
+
+    @patch.object(FirebaseService, "_lookup_first_and_last_document_id", return_value=("first", "last"))
+    @patch("src.data.firebase_service.DOC_ID_CACHE_MAX_ENTRIES", 2)
+    def test_oldest_entries_are_evicted(self, mock_lookup):
+        """Test that the cache keeps at most DOC_ID_CACHE_MAX_ENTRIES pools."""
+        for pool_id in ["pool1", "pool2", "pool3"]:
+            self.firebase_service.get_first_and_last_document_id(pool_id)
+
+        self.assertEqual(list(self.firebase_service._doc_id_cache), ["pool2", "pool3"])
+
+    @patch("src.data.firebase_service.DOC_ID_CACHE_MAX_ENTRIES", 2)
+    def test_collection_references_are_capped(self):
+        """Test that memoized collection references are evicted oldest first."""
+        for pool_id in ["pool1", "pool2", "pool3"]:
+            self.firebase_service._contexts_ref(pool_id)
+
+        self.assertEqual(list(self.firebase_service._contexts_refs), ["pool2", "pool3"])
+
+    @patch.object(FirebaseService, "get_first_and_last_document_ids")
+    def test_document_ids_are_yielded_in_batches(self, mock_bulk_lookup):
+        """Test that long pool lists are looked up batch by batch and yielded in order."""
+        mock_bulk_lookup.side_effect = lambda pool_ids: {p: (p + "_1", p + "_2") for p in pool_ids}
+
+        doc_ids = list(self.firebase_service.iter_first_and_last_document_ids(["a", "b", "c"], batch_size=2))
+
+        self.assertEqual(doc_ids, [("a", ("a_1", "a_2")), ("b", ("b_1", "b_2")), ("c", ("c_1", "c_2"))])
+        self.assertEqual(mock_bulk_lookup.call_count, 2)
+
+
+class TestPoolCache(unittest.TestCase):
+    """Test caching of pool lists and datapoint counts."""
+
+    def setUp(self):
+        """Set up a service backed by a mock Firestore client."""
+        with patch("src.data.firebase_service._get_db", return_value=MagicMock()):
+            self.firebase_service = FirebaseService()
+
+    @patch("src.data.firebase_service.get_pool_ids", return_value=["pool_a", "pool_b"])
+    def test_available_pools_are_cached_until_refresh(self, mock_get_pool_ids):
+        """Test that repeat pool list requests hit memory until refresh() is called."""
+        self.assertEqual(self.firebase_service.get_available_pools(limit=2), ["pool_a", "pool_b"])
+        self.assertEqual(self.firebase_service.get_available_pools(limit=2), ["pool_a", "pool_b"])
+        self.assertEqual(mock_get_pool_ids.call_count, 1)
+
+        self.firebase_service.refresh()
+        self.firebase_service.get_available_pools(limit=2)
+        self.assertEqual(mock_get_pool_ids.call_count, 2)
+
+    def test_datapoint_count_is_cached(self):
+        """Test that a single-pool count is only queried once within the TTL."""
+        with patch.object(
+            self.firebase_service, "_get_status_datapoints_counts", return_value={"pool_a": 42}
+        ) as mock_status:
+            self.assertEqual(self.firebase_service._get_single_pool_datapoints_count("pool_a"), 42)
+            self.assertEqual(self.firebase_service._get_single_pool_datapoints_count("pool_a"), 42)
+            self.assertEqual(mock_status.call_count, 1)
+
+    @patch.object(FirebaseService, "_get_status_datapoints_counts", return_value={})
+    def test_failed_counts_are_left_out(self, mock_status):
+        """Test that a pool whose count query fails is not reported as having no datapoints."""
+
+        def count(pool_id):
+            if pool_id == "pool_b":
+                raise RuntimeError("deadline exceeded")
+            return 42
+
+        with patch.object(self.firebase_service, "_count_pool_datapoints_with_backoff", side_effect=count):
+            counts = self.firebase_service.get_pools_datapoints_counts(["pool_a", "pool_b"])
+
+        self.assertEqual(counts, {"pool_a": 42})
+
+
+class TestPreprocessingMarkers(unittest.TestCase):
+    """Test that the two preprocessing pipelines do not skip each other's work."""
+
+    def setUp(self):
+        """Set up a service backed by a mock Firestore client and a raw market data frame."""
+        with patch("src.data.firebase_service._get_db", return_value=MagicMock()):
+            self.firebase_service = FirebaseService()
+        self.raw_df = pd.DataFrame(
+            {
+                "timestamp": ["2024-01-01T00:00:00Z", "2024-01-01T00:00:01Z"],
+                "poolAddress": ["pool", "pool"],
+                "marketCap": ["1000", "1100"],
+                "holderDelta30s": ["5", "6"],
+            }
+        )
+
+    def test_service_preprocessing_runs_after_market_data_preprocessing(self):
+        """Test that preprocess_data still parses timestamps of a frame from preprocess_market_data."""
+        df = self.firebase_service.preprocess_data(preprocess_market_data(self.raw_df))
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(df["timestamp"]))
+
+    def test_service_preprocessing_leaves_input_unchanged(self):
+        """Test that preprocess_data does not reorder or retype the caller's frame."""
+        raw_df = pd.concat([self.raw_df.iloc[::-1], self.raw_df.assign(poolAddress="other")], ignore_index=True)
+        original = raw_df.copy()
+
+        self.firebase_service.preprocess_data(raw_df)
+
+        pd.testing.assert_frame_equal(raw_df, original)
+
+    def test_market_data_preprocessing_runs_after_service_preprocessing(self):
+        """Test that preprocess_market_data still converts columns of a frame from preprocess_data."""
+        df = preprocess_market_data(self.firebase_service.preprocess_data(self.raw_df.copy()))
+        self.assertTrue(pd.api.types.is_numeric_dtype(df["holderDelta30s"]))
+
+
+class TestPoolLayoutDetection(unittest.TestCase):
+    """Test that the storage layout used by pools is remembered between lookups."""
+
+    def setUp(self):
+        """Set up a service backed by a mock Firestore client."""
+        with patch("src.data.firebase_service._get_db", return_value=MagicMock()):
+            self.firebase_service = FirebaseService()
+
+    @patch.object(FirebaseService, "_lookup_flat_documents")
+    @patch.object(FirebaseService, "_lookup_pool_field_documents", return_value=([], []))
+    @patch.object(FirebaseService, "_lookup_subcollection_documents", return_value=([], []))
+    def test_flat_layout_is_tried_first_once_known(self, mock_subcol, mock_pool_field, mock_flat):
+        """Test that a pool found in the flat layout is looked up there first afterwards."""
+        mock_flat.return_value = ([MagicMock(id="pool_1")], [MagicMock(id="pool_2")])
+
+        self.assertEqual(self.firebase_service._lookup_first_and_last_document_id("pool"), ("pool_1", "pool_2"))
+        self.assertEqual(self.firebase_service._default_layout, "flat")
+
+        self.firebase_service._lookup_first_and_last_document_id("other")
+        self.assertEqual(mock_subcol.call_count, 1)
+        mock_pool_field.assert_not_called()
+        self.assertEqual(mock_flat.call_count, 2)
+
+    def test_single_boundary_lookup_queries_only_that_end(self):
+        """Test that get_last_document_id does not query the first document."""
+        last_doc = MagicMock(id="pool_2")
+        with patch.object(
+            self.firebase_service, "_lookup_subcollection_documents", return_value=[[last_doc]]
+        ) as mock_subcol:
+            self.assertEqual(self.firebase_service.get_last_document_id("pool"), "pool_2")
+            mock_subcol.assert_called_once_with("pool", ("last",))
+
+    @patch.object(FirebaseService, "_lookup_flat_documents", return_value=([], []))
+    @patch.object(FirebaseService, "_lookup_pool_field_documents", return_value=([], []))
+    @patch.object(FirebaseService, "_lookup_subcollection_documents", return_value=([], []))
+    def test_no_documents_in_either_layout(self, mock_subcol, mock_pool_field, mock_flat):
+        """Test that (None, None) is returned when neither layout has documents."""
+        self.assertEqual(self.firebase_service._lookup_first_and_last_document_id("pool"), (None, None))
+        self.assertIsNone(self.firebase_service._default_layout)
+
+    @patch.object(FirebaseService, "_lookup_flat_documents", return_value=([], []))
+    @patch.object(FirebaseService, "_lookup_subcollection_documents", return_value=([], []))
+    def test_pool_field_layout_is_skipped_without_index(self, mock_subcol, mock_flat):
+        """Test that the poolId layout is not queried again once its index is known to be missing."""
+        pool_query = self.firebase_service.db.collection.return_value.select.return_value.where.return_value
+        pool_query.order_by.return_value.limit.return_value.get.side_effect = FailedPrecondition("index missing")
+
+        self.firebase_service._lookup_first_and_last_document_id("pool")
+        self.assertTrue(self.firebase_service._pool_field_index_missing)
+
+        with patch.object(self.firebase_service, "_lookup_pool_field_documents") as mock_pool_field:
+            self.assertEqual(self.firebase_service._lookup_first_and_last_document_id("other"), (None, None))
+            mock_pool_field.assert_not_called()
+
+    def test_default_layout_follows_layout_counts(self):
+        """Test that the default layout is only set while every known pool uses it."""
+        self.firebase_service._remember_pool_layout("pool_1", "flat")
+        self.firebase_service._remember_pool_layout("pool_2", "flat")
+        self.assertEqual(self.firebase_service._default_layout, "flat")
+
+        self.firebase_service._remember_pool_layout("pool_3", "subcol")
+        self.assertIsNone(self.firebase_service._default_layout)
+
+        # A pool re-detected in another layout moves its count
+        self.firebase_service._remember_pool_layout("pool_3", "flat")
+        self.assertEqual(self.firebase_service._default_layout, "flat")
+
+    @patch.object(FirebaseService, "_lookup_flat_documents", return_value=[[]])
+    @patch.object(FirebaseService, "_lookup_pool_field_documents", return_value=[[]])
+    @patch.object(FirebaseService, "_lookup_subcollection_documents", return_value=[[]])
+    def test_pool_index_is_not_read_by_default(self, mock_subcol, mock_pool_field, mock_flat):
+        """Test that no poolIndex document is read unless use_pool_index is enabled."""
+        self.assertEqual(self.firebase_service._lookup_document_ids("pool", ("last",)), [None])
+        self.firebase_service.db.collection.assert_not_called()
+
+    def test_pool_index_answers_when_enabled(self):
+        """Test that an enabled poolIndex document short-circuits the layout queries."""
+        self.firebase_service.use_pool_index = True
+        snapshot = self.firebase_service.db.collection.return_value.document.return_value.get.return_value
+        snapshot.exists = True
+        snapshot.to_dict.return_value = {"first_doc_id": "pool_1", "last_doc_id": "pool_2"}
+        with patch.object(self.firebase_service, "_lookup_subcollection_documents") as mock_subcol:
+            self.assertEqual(self.firebase_service._lookup_first_and_last_document_id("pool"), ("pool_1", "pool_2"))
+            mock_subcol.assert_not_called()
+        self.firebase_service.db.collection.assert_called_with("poolIndex")
+
+
 if __name__ == "__main__":
     unittest.main()
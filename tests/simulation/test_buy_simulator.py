@@ -265,6 +265,15 @@ class TestBuySimulator(unittest.TestCase):
         self.assertIn("entry_metrics", buy_opportunity)
         self.assertIn("post_entry_data", buy_opportunity)
 
+        # Post-entry data starts at the entry row and is indexed from 0
+        post_entry_data = buy_opportunity["post_entry_data"]
+        self.assertEqual(len(post_entry_data), len(mock_df) - buy_opportunity["entry_row"])
+        self.assertTrue(post_entry_data.index.equals(pd.RangeIndex(len(post_entry_data))))
+        pd.testing.assert_series_equal(
+            post_entry_data["holders"],
+            mock_df["holders"].iloc[buy_opportunity["entry_row"] :].reset_index(drop=True),
+        )
+
     def test_find_buy_opportunity_rejected(self):
         """Test rejecting a buy opportunity due to insufficient growth."""
         # Set buy parameters too high for our test data
@@ -290,6 +299,30 @@ class TestBuySimulator(unittest.TestCase):
         # Verify no buy opportunity was found
         self.assertIsNone(buy_opportunity)
 
+    def test_vectorized_scan_matches_row_by_row_check(self):
+        """Test that the vectorized threshold scan picks the same entry row as checking each row."""
+        timestamps = [datetime.now() + timedelta(minutes=i) for i in range(40)]
+        data = {
+            "timestamp": timestamps,
+            "marketCap": [10000 + 100 * i for i in range(40)],
+            "holders": [100 + i for i in range(40)],
+            "marketCapChange5s": [1.0] * 20 + [float("nan")] + [10.0] * 19,  # NaN does not fail a check
+            "holderDelta30s": [10] * 22 + [1] + [10] * 17,
+            "pool_address": ["test_pool"] * 40,
+        }
+        buy_params = {"mc_change_5s": 5.0, "holder_delta_30s": 5, "mc_growth_from_start": 15.0}
+
+        vectorized = BuySimulator(early_mc_limit=0, min_delay=5, max_delay=30, buy_params=buy_params)
+        row_by_row = BuySimulator(early_mc_limit=0, min_delay=5, max_delay=30, buy_params=buy_params)
+        row_by_row.vectorized_conditions = False
+
+        expected = row_by_row.find_buy_opportunity(pd.DataFrame(data))
+        actual = vectorized.find_buy_opportunity(pd.DataFrame(data))
+
+        self.assertEqual(expected["entry_row"], 20)
+        self.assertEqual(actual["entry_row"], expected["entry_row"])
+        pd.testing.assert_series_equal(pd.Series(actual["entry_metrics"]), pd.Series(expected["entry_metrics"]))
+
     def test_calculate_returns(self):
         """Test calculating potential returns from a buy opportunity."""
         # Create a sample buy opportunity
@@ -328,6 +361,23 @@ class TestBuySimulator(unittest.TestCase):
         # Time to max should be positive
         self.assertGreaterEqual(result["time_to_max"], 0)
 
+    def test_calculate_returns_uses_stored_entry_timestamp(self):
+        """Test that a stored entry timestamp gives the same time to max as parsing entry_time."""
+        entry_row = 10
+        buy_opportunity = {
+            "pool_address": "test_pool_123",
+            "entry_price": self.mock_market_caps[entry_row],
+            "entry_time": self.sample_timestamps[entry_row].isoformat(),
+            "entry_row": entry_row,
+            "entry_metrics": {},
+            "post_entry_data": self.mock_df.iloc[entry_row:].reset_index(drop=True),
+        }
+
+        parsed = calculate_returns(dict(buy_opportunity))
+        stored = calculate_returns(dict(buy_opportunity, entry_time_ts=pd.Timestamp(self.sample_timestamps[entry_row])))
+
+        self.assertAlmostEqual(stored["time_to_max"], parsed["time_to_max"])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,34 @@
+import unittest
+from unittest.mock import MagicMock
+import sys
+import os
+from datetime import datetime, timezone
+
+# Add the src directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from src.utils.firebase_utils import fetch_market_data_for_pool, to_epoch_ms
+
+
+class TestFetchMarketDataForPool(unittest.TestCase):
+    """Test fetch_market_data_for_pool query construction."""
+
+    def test_since_is_sent_as_epoch_milliseconds(self):
+        """Test that the recent-data cutoff is compared against the stored epoch-ms integers."""
+        db = MagicMock()
+        contexts_collection = db.collection.return_value.document.return_value.collection.return_value
+        contexts_collection.where.return_value.order_by.return_value.limit.return_value.stream.return_value = []
+
+        since = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        fetch_market_data_for_pool(db, "test_pool", since=since)
+
+        contexts_collection.where.assert_called_once_with("timestamp", ">=", 1704067200000)
+        self.assertIsInstance(contexts_collection.where.call_args.args[2], int)
+
+    def test_epoch_milliseconds_are_passed_through(self):
+        """Test that an epoch-ms cutoff is used as is."""
+        self.assertEqual(to_epoch_ms(1704067200000), 1704067200000)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,41 @@
+import unittest
+import sys
+import os
+import time
+
+# Add the src directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from src.utils.rate_limiter import TokenBucket
+
+
+class TestTokenBucket(unittest.TestCase):
+    """Test TokenBucket rate limiter."""
+
+    def test_burst_up_to_capacity(self):
+        """Test that a full bucket allows `capacity` immediate requests."""
+        bucket = TokenBucket(capacity=3, refill_rate=0.001)
+        self.assertTrue(bucket.try_acquire())
+        self.assertTrue(bucket.try_acquire())
+        self.assertTrue(bucket.try_acquire())
+        self.assertFalse(bucket.try_acquire())
+
+    def test_acquire_waits_for_refill(self):
+        """Test that acquire blocks until a token has been refilled."""
+        bucket = TokenBucket(capacity=1, refill_rate=20)
+        bucket.acquire()
+
+        start = time.monotonic()
+        bucket.acquire()
+        self.assertGreaterEqual(time.monotonic() - start, 0.04)
+
+    def test_invalid_parameters(self):
+        """Test that non-positive parameters are rejected."""
+        with self.assertRaises(ValueError):
+            TokenBucket(capacity=0, refill_rate=1)
+        with self.assertRaises(ValueError):
+            TokenBucket(capacity=1, refill_rate=0)
+
+
+if __name__ == "__main__":
+    unittest.main()